@@ -0,0 +1,11 @@
+"""ASGI entry point for benchmarks: the real backend app with an in-memory database.
+
+Started by bench/run.py as ``uvicorn bench.app_under_test:app`` with
+POS_API_BASE_URL / POS_API_V2_URL pointing at the mock POS.
+"""
+import server
+from bench.memory_db import MemoryDatabase
+
+
+server.db = MemoryDatabase()
+app = server.app
@@ -0,0 +1,181 @@
+"""In-memory stand-in for the Motor database used by the benchmark suite.
+
+Implements the subset of the AsyncIOMotorCollection API the backend uses so
+benchmarks measure the kiosk backend rather than a Mongo deployment. Writes
+yield to the event loop like a real driver round trip would, but never block.
+"""
+import asyncio
+import copy
+import uuid
+
+from pymongo.errors import DuplicateKeyError
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class UpdateResult:
+    def __init__(self, matched_count=0, modified_count=0, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class BulkWriteResult:
+    def __init__(self, matched_count=0, modified_count=0):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+
+
+class MemoryCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=1):
+        self._docs.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return self._docs[:length] if length else list(self._docs)
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+            for op, arg in cond.items():
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$nin" and value in arg:
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$exists" and (key in doc) != bool(arg):
+                    return False
+                if op == "$lt" and not (value is not None and value < arg):
+                    return False
+                if op == "$lte" and not (value is not None and value <= arg):
+                    return False
+                if op == "$gt" and not (value is not None and value > arg):
+                    return False
+                if op == "$gte" and not (value is not None and value >= arg):
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        result = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False) -> None:
+    for key, value in update.get("$set", {}).items():
+        doc[key] = copy.deepcopy(value)
+    for key, value in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + value
+    if inserting:
+        for key, value in update.get("$setOnInsert", {}).items():
+            doc[key] = copy.deepcopy(value)
+
+
+class MemoryCollection:
+    def __init__(self):
+        self._docs = []
+
+    async def insert_one(self, document: dict):
+        await asyncio.sleep(0)
+        document.setdefault("_id", uuid.uuid4().hex)
+        self._docs.append(copy.deepcopy(document))
+        return InsertOneResult(document["_id"])
+
+    async def find_one(self, query=None, projection=None):
+        await asyncio.sleep(0)
+        for doc in self._docs:
+            if _matches(doc, query or {}):
+                return _project(doc, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        return MemoryCursor([_project(d, projection) for d in self._docs if _matches(d, query or {})])
+
+    async def count_documents(self, query):
+        await asyncio.sleep(0)
+        return sum(1 for d in self._docs if _matches(d, query))
+
+    async def update_one(self, query, update, upsert=False):
+        await asyncio.sleep(0)
+        for doc in self._docs:
+            if _matches(doc, query):
+                _apply_update(doc, update)
+                return UpdateResult(1, 1)
+        if not upsert:
+            return UpdateResult()
+        doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+        if "_id" in doc and any(d["_id"] == doc["_id"] for d in self._docs):
+            raise DuplicateKeyError(f"E11000 duplicate key error: _id {doc['_id']!r}")
+        _apply_update(doc, update, inserting=True)
+        doc.setdefault("_id", uuid.uuid4().hex)
+        self._docs.append(doc)
+        return UpdateResult(upserted_id=doc["_id"])
+
+    async def bulk_write(self, requests, ordered=True):
+        """Apply pymongo UpdateOne requests (the only kind the backend sends)"""
+        await asyncio.sleep(0)
+        matched = 0
+        for request in requests:
+            for doc in self._docs:
+                if _matches(doc, request._filter):
+                    _apply_update(doc, request._doc)
+                    matched += 1
+                    break
+        return BulkWriteResult(matched, matched)
+
+    async def delete_many(self, query):
+        await asyncio.sleep(0)
+        self._docs = [d for d in self._docs if not _matches(d, query)]
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+
+class MemoryDatabase:
+    """Attribute access creates collections on demand, like a Motor database"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection()
+        return self._collections[name]
@@ -0,0 +1,114 @@
+"""Menu transformation benchmark.
+
+Builds the menu snapshot for a synthetic menu of ``--menu-size`` foods (the
+recorded fixture replicated) through server.build_menu_snapshot, once inline
+on the event loop and once through the process pool, and reports build time
+together with the event-loop lag observed during the build. The lag is how
+long every other in-flight request (orders included) would have stalled while
+a menu refresh was being transformed.
+
+Run from the backend directory:
+
+    python -m bench.menu_transform --menu-size 5000
+    python -m bench.menu_transform --menu-size 20000 --chunk-size 500 --output menu.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.mock_pos import load_foods
+from bench.receipts import probe_loop_lag
+from bench.run import git_commit, percentile
+
+
+MODES = ["inline", "pool"]
+
+
+async def run_mode(server, mode: str, foods: list, rounds: int) -> dict:
+    server.MENU_POOL_THRESHOLD = len(foods) + 1 if mode == "inline" else 0
+    if mode == "pool":
+        # Start the pool's workers before measuring
+        await server.build_menu_snapshot(foods[:server.MENU_POOL_CHUNK_SIZE])
+
+    builds = []
+    lag = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lag, stop))
+    for _ in range(rounds):
+        # Let the probe arm its timer so a blocking build shows up as lag
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        snapshot = await server.build_menu_snapshot(foods)
+        builds.append((time.perf_counter() - start) * 1000)
+    await asyncio.sleep(0.05)
+    stop.set()
+    await probe
+
+    builds.sort()
+    lag.sort()
+    return {
+        "items": len(snapshot.items),
+        "version": snapshot.version,
+        "build_ms": {"p50": round(percentile(builds, 50), 1), "max": round(builds[-1], 1)},
+        "loop_lag_ms": {"p99": round(percentile(lag, 99), 3), "max": round(lag[-1], 3) if lag else 0.0},
+    }
+
+
+async def run_benchmark(args) -> dict:
+    # server reads its configuration at import time; it never connects to Mongo here
+    os.environ.setdefault("MONGO_URL", "mongodb://127.0.0.1:1")
+    os.environ.setdefault("DB_NAME", "kiosk_bench")
+    os.environ["MENU_POOL_CHUNK_SIZE"] = str(args.chunk_size)
+    os.environ["MENU_POOL_WORKERS"] = str(args.workers)
+    import server
+
+    foods = load_foods(args.menu_size)
+    results = {}
+    try:
+        for mode in args.modes:
+            results[mode] = await run_mode(server, mode, foods, args.rounds)
+            print(f"{mode:8s} build p50 {results[mode]['build_ms']['p50']:8.1f}ms  "
+                  f"loop lag p99 {results[mode]['loop_lag_ms']['p99']:7.2f}ms  "
+                  f"max {results[mode]['loop_lag_ms']['max']:7.2f}ms", file=sys.stderr)
+    finally:
+        server.menu_pool.shutdown()
+    if len({result["version"] for result in results.values()}) > 1:
+        print("WARNING: inline and pooled builds produced different menu versions", file=sys.stderr)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "config": {"menu_size": len(foods), "chunk_size": args.chunk_size, "workers": args.workers,
+                   "rounds": args.rounds},
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Menu snapshot build time and event-loop impact")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--menu-size", type=int, default=5000, help="Foods in the synthetic menu")
+    parser.add_argument("--chunk-size", type=int, default=250, help="Foods per process pool task")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Process pool size")
+    parser.add_argument("--rounds", type=int, default=3, help="Snapshot builds per mode")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
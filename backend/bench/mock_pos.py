@@ -0,0 +1,122 @@
+"""Local stand-in for the MyGenie POS API used by the benchmark suite.
+
+Serves the POS endpoints the kiosk backend calls, built from the recorded
+fixtures in bench/fixtures. Behaviour is controlled through environment
+variables so the benchmark runner can start it as a plain uvicorn process:
+
+    MOCK_POS_LATENCY_MS   fixed latency added to every response (default 50)
+    MOCK_POS_JITTER_MS    uniform random jitter added on top (default 0)
+    MOCK_POS_ERROR_RATE   fraction of requests answered with HTTP 500 (default 0)
+    MOCK_POS_MENU_SIZE    number of foods returned; fixtures are replicated
+                          with fresh ids to reach it (default: fixture size)
+    MOCK_POS_ORDER_STEP_S seconds each placed order spends in a status before
+                          moving on (pending, cooking, done, delivered;
+                          default 5)
+"""
+import asyncio
+import copy
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+LATENCY_MS = float(os.environ.get("MOCK_POS_LATENCY_MS", "50"))
+JITTER_MS = float(os.environ.get("MOCK_POS_JITTER_MS", "0"))
+ERROR_RATE = float(os.environ.get("MOCK_POS_ERROR_RATE", "0"))
+ORDER_STEP_S = float(os.environ.get("MOCK_POS_ORDER_STEP_S", "5"))
+ORDER_STATUSES = ("pending", "cooking", "done", "delivered")
+
+
+def load_foods(menu_size: int = 0) -> list:
+    """Load recorded foods and replicate them up to ``menu_size`` entries"""
+    foods = json.loads((FIXTURES_DIR / "foods.json").read_text())["foods"]
+    if menu_size <= len(foods):
+        return foods[:menu_size] if menu_size else foods
+
+    scaled = []
+    for i in range(menu_size):
+        food = copy.deepcopy(foods[i % len(foods)])
+        if i >= len(foods):
+            food["id"] = 100000 + i
+            food["name"] = f"{food['name']} {i // len(foods)}"
+        scaled.append(food)
+    return scaled
+
+
+def load_table_config() -> dict:
+    return json.loads((FIXTURES_DIR / "table_config.json").read_text())
+
+
+FOODS_PAYLOAD = {"foods": load_foods(int(os.environ.get("MOCK_POS_MENU_SIZE", "0")))}
+TABLE_CONFIG_PAYLOAD = load_table_config()
+
+app = FastAPI()
+order_counter = {"next": 900000}
+# order_id -> time placed
+placed_orders = {}
+
+
+async def simulate_upstream():
+    """Sleep for the configured latency and decide whether to fail this call"""
+    delay = LATENCY_MS + (random.uniform(0, JITTER_MS) if JITTER_MS else 0)
+    if delay:
+        await asyncio.sleep(delay / 1000)
+    return random.random() < ERROR_RATE
+
+
+def upstream_error():
+    return JSONResponse(status_code=500, content={"errors": [{"code": "mock", "message": "Injected failure"}]})
+
+
+@app.post("/api/v1/auth/vendoremployee/login")
+async def login(request: Request):
+    if await simulate_upstream():
+        return upstream_error()
+    body = await request.json()
+    if not body.get("email") or not body.get("password"):
+        return JSONResponse(status_code=401, content={"errors": [{"code": "auth", "message": "Unauthorized"}]})
+    return {"token": "bench-token", "role_name": "Kiosk", "role": ["kiosk"], "firebase_token": None, "first_login": "no"}
+
+
+@app.get("/api/v2/vendoremployee/product/foods-list")
+async def foods_list():
+    if await simulate_upstream():
+        return upstream_error()
+    return FOODS_PAYLOAD
+
+
+@app.get("/api/v2/vendoremployee/restaurant-settings/table-config")
+async def table_config():
+    if await simulate_upstream():
+        return upstream_error()
+    return TABLE_CONFIG_PAYLOAD
+
+
+@app.post("/api/v2/vendoremployee/buffet/buffet-place-order")
+async def buffet_place_order(request: Request):
+    if await simulate_upstream():
+        return upstream_error()
+    form = await request.form()
+    json.loads(form["data"])
+    order_counter["next"] += 1
+    placed_orders[order_counter["next"]] = time.monotonic()
+    return {"message": "Order placed successfully", "order_id": order_counter["next"]}
+
+
+@app.get("/api/v2/vendoremployee/order/running-orders")
+async def running_orders():
+    if await simulate_upstream():
+        return upstream_error()
+    now = time.monotonic()
+    orders = []
+    for order_id, placed_at in placed_orders.items():
+        step = min(int((now - placed_at) / ORDER_STEP_S), len(ORDER_STATUSES) - 1) if ORDER_STEP_S else -1
+        orders.append({"id": order_id, "order_status": ORDER_STATUSES[step]})
+    return {"orders": orders}
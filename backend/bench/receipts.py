@@ -0,0 +1,174 @@
+"""Receipt rendering benchmark.
+
+Renders receipts for synthetic orders (built from the recorded menu fixture)
+through ``receipts.ReceiptRenderer`` and reports receipts per second together
+with the event-loop lag observed while rendering. Lag is what order requests
+on the same worker would feel, so comparing the ``inline`` mode (render on the
+loop, what doing it inside create_order would cost) with the ``thread`` and
+``process`` pools shows whether rendering stays off the request path.
+
+Run from the backend directory:
+
+    python -m bench.receipts --orders 2000 --concurrency 64
+    python -m bench.receipts --modes thread process --workers 4 --output receipts.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.mock_pos import load_foods
+from bench.run import git_commit, percentile
+from receipts import RECEIPT_FORMATS, ReceiptRenderer, render_receipt
+
+
+MODES = ["inline", "thread", "process"]
+LAG_PROBE_INTERVAL = 0.005
+
+
+def build_orders(count: int, seed: int = 7) -> list:
+    """Synthetic confirmed orders with 1-8 lines, variations and notes"""
+    rng = random.Random(seed)
+    foods = load_foods()
+    orders = []
+    for n in range(count):
+        items = []
+        for food in rng.sample(foods, k=min(len(foods), rng.randint(1, 8))):
+            groups = {group["name"]: [value["label"] for value in group.get("values", [])[:2]]
+                      for group in food.get("variation") or []}
+            items.append({
+                "item_id": str(food["id"]),
+                "name": food["name"],
+                "price": float(food.get("price", 0)),
+                "quantity": rng.randint(1, 3),
+                "variations": [],
+                "grouped_variations": groups,
+                "special_instructions": "less spicy" if rng.random() < 0.2 else None,
+            })
+        subtotal = round(sum(item["price"] * item["quantity"] for item in items), 2)
+        orders.append({
+            "id": str(uuid.uuid4()),
+            "pos_order_id": str(900000 + n),
+            "table_number": str(rng.randint(1, 24)),
+            "items": items,
+            "subtotal": subtotal,
+            "discount": 0,
+            "cgst": round(subtotal * 0.025, 2),
+            "sgst": round(subtotal * 0.025, 2),
+            "total": round(subtotal * 1.05, 2),
+            "customer_name": "Bench Guest",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+    return orders
+
+
+async def probe_loop_lag(samples: list, stop: asyncio.Event):
+    """Record how late each short sleep wakes up; the excess is time the loop was blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        samples.append((time.perf_counter() - start - LAG_PROBE_INTERVAL) * 1000)
+
+
+async def run_mode(mode: str, orders: list, concurrency: int, workers: int) -> dict:
+    executor = None
+    renderer = None
+    if mode == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers)
+    elif mode == "process":
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    if executor is not None:
+        renderer = ReceiptRenderer(executor, "Bench Kitchen", cache_size=len(orders) * len(RECEIPT_FORMATS))
+        # Start the pool's workers before measuring
+        await asyncio.gather(*(renderer.render(order, "text") for order in build_orders(workers, seed=1)))
+
+    queue = list(orders)
+    latencies = []
+    lag = []
+    stop = asyncio.Event()
+
+    async def worker():
+        while queue:
+            order = queue.pop()
+            for fmt in RECEIPT_FORMATS:
+                start = time.perf_counter()
+                if renderer is None:
+                    render_receipt(order, fmt, "Bench Kitchen")
+                    await asyncio.sleep(0)
+                else:
+                    await renderer.render(order, fmt)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    probe = asyncio.create_task(probe_loop_lag(lag, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    if executor is not None:
+        executor.shutdown()
+
+    latencies.sort()
+    lag.sort()
+    return {
+        "receipts": len(latencies),
+        "receipts_per_sec": round(len(latencies) / elapsed, 1),
+        "render_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p99": round(percentile(latencies, 99), 3),
+        },
+        "loop_lag_ms": {
+            "p50": round(percentile(lag, 50), 3),
+            "p99": round(percentile(lag, 99), 3),
+            "max": round(lag[-1], 3) if lag else 0.0,
+        },
+    }
+
+
+async def run_benchmark(args) -> dict:
+    orders = build_orders(args.orders)
+    results = {}
+    for mode in args.modes:
+        results[mode] = await run_mode(mode, orders, args.concurrency, args.workers)
+        print(f"{mode:8s} {results[mode]['receipts_per_sec']:10.1f} receipts/s  "
+              f"render p99 {results[mode]['render_ms']['p99']:8.2f}ms  "
+              f"loop lag p99 {results[mode]['loop_lag_ms']['p99']:7.2f}ms  "
+              f"max {results[mode]['loop_lag_ms']['max']:7.2f}ms", file=sys.stderr)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "config": {"orders": args.orders, "concurrency": args.concurrency, "workers": args.workers},
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Receipt rendering throughput and event-loop impact")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--orders", type=int, default=2000, help="Orders to render (each in every format)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent render requests")
+    parser.add_argument("--workers", type=int, default=2, help="Pool size for the thread and process modes")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
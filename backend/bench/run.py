@@ -0,0 +1,307 @@
+"""Offline load test for the kiosk backend.
+
+Starts the mock POS (bench/mock_pos.py) and the real FastAPI app backed by an
+in-memory database (bench/app_under_test.py) as local uvicorn processes, then
+drives concurrent load against the kiosk endpoints and reports latency
+percentiles and throughput as JSON.
+
+Run from the backend directory:
+
+    python -m bench.run --duration 10 --concurrency 32 --output bench.json
+    python -m bench.run --baseline bench.json      # compare against a previous run
+
+The JSON output carries the git commit and the full configuration so results
+from different commits can be compared directly.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from bench.mock_pos import load_foods, load_table_config
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+ENDPOINTS = ["menu_items", "menu_categories", "tables", "bootstrap", "orders"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def start_uvicorn(module_app: str, port: int, env: dict, workers: int = 1, verbose: bool = False) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "uvicorn", module_app,
+        "--host", "127.0.0.1", "--port", str(port),
+        "--log-level", "warning", "--no-access-log",
+    ]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    # Server logs (e.g. the per-order payload dump) are discarded unless asked for
+    output = None if verbose else subprocess.DEVNULL
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=output, stderr=output)
+
+
+async def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url, timeout=1.0)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+
+def orderable_tables() -> list:
+    return [t for t in load_table_config()["data"]["tables"] if t.get("status") == 1 and t.get("rtype") == "TB"]
+
+
+def build_order_payload(foods: list, tables: list, n: int) -> dict:
+    available = [f for f in foods if f.get("status", 1) == 1]
+    items = []
+    for food in available[:3]:
+        grouped = {}
+        for group in food.get("variation", [])[:1]:
+            grouped[group["name"].upper()] = [group["values"][0]["label"].upper()]
+        items.append({
+            "item_id": str(food["id"]),
+            "name": food["name"],
+            "price": float(food["price"]),
+            "quantity": 1,
+            "grouped_variations": grouped,
+        })
+    total = sum(i["price"] for i in items)
+    table = tables[n % len(tables)]
+    return {
+        "table_number": table["table_no"],
+        "table_id": str(table["id"]),
+        "items": items,
+        "subtotal": total,
+        "total": total,
+        "customer_name": f"Bench Guest {n}",
+    }
+
+
+def scenario_request(name: str, foods: list):
+    """Return a callable producing (method, path, json_body) for request number n"""
+    if name == "menu_items":
+        return lambda n: ("GET", "/api/menu/items", None)
+    if name == "menu_categories":
+        return lambda n: ("GET", "/api/menu/categories", None)
+    if name == "tables":
+        return lambda n: ("GET", "/api/tables", None)
+    if name == "bootstrap":
+        return lambda n: ("GET", "/api/kiosk/bootstrap", None)
+    if name == "orders":
+        tables = orderable_tables()
+        return lambda n: ("POST", "/api/orders", build_order_payload(foods, tables, n))
+    raise ValueError(f"Unknown endpoint {name}")
+
+
+async def run_scenario(base_url: str, token: str, make_request, duration: float, concurrency: int) -> dict:
+    latencies = []
+    statuses = {}
+    errors = 0
+    counter = {"n": 0}
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0,
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                counter["n"] += 1
+                method, path, body = make_request(counter["n"])
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    status = response.status_code
+                    response.read()
+                except httpx.HTTPError:
+                    status = "error"
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if status == "error" or status >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "requests_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run_benchmark(args) -> dict:
+    pos_port, app_port = free_port(), free_port()
+    pos_url = f"http://127.0.0.1:{pos_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    pos_env = {
+        "MOCK_POS_LATENCY_MS": str(args.pos_latency_ms),
+        "MOCK_POS_JITTER_MS": str(args.pos_jitter_ms),
+        "MOCK_POS_ERROR_RATE": str(args.pos_error_rate),
+        "MOCK_POS_MENU_SIZE": str(args.menu_size),
+    }
+    app_env = {
+        "MONGO_URL": "mongodb://127.0.0.1:1",
+        "DB_NAME": "kiosk_bench",
+        "POS_API_BASE_URL": f"{pos_url}/api/v1",
+        "POS_API_V2_URL": f"{pos_url}/api/v2",
+        # All load shares one session and kiosk id; the per-kiosk order limit would cap throughput
+        "ORDER_RATE_PER_MINUTE": "0",
+    }
+    if args.workers > 1:
+        # Aggregate /metrics across workers as a multi-worker deployment should
+        app_env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="kiosk-metrics-")
+
+    processes = [start_uvicorn("bench.mock_pos:app", pos_port, pos_env, verbose=args.verbose)]
+    try:
+        await wait_until_up(f"{pos_url}/docs")
+        processes.append(start_uvicorn("bench.app_under_test:app", app_port, app_env, args.workers, args.verbose))
+        await wait_until_up(f"{app_url}/api/")
+
+        async with httpx.AsyncClient(base_url=app_url, timeout=30.0) as client:
+            login = await client.post("/api/auth/login", json={"email": "bench@kiosk.local", "password": "bench"})
+            login.raise_for_status()
+            token = login.json()["token"]
+
+        foods = load_foods(args.menu_size)
+        results = {}
+        for name in args.endpoints:
+            make_request = scenario_request(name, foods)
+            # Warm caches and connections so the measured window reflects steady state
+            await run_scenario(app_url, token, make_request, args.warmup, min(args.concurrency, 4))
+            results[name] = await run_scenario(app_url, token, make_request, args.duration, args.concurrency)
+            print(f"{name:16s} {results[name]['requests_per_sec']:10.1f} req/s  "
+                  f"p50 {results[name]['latency_ms']['p50']:8.2f}ms  "
+                  f"p95 {results[name]['latency_ms']['p95']:8.2f}ms  "
+                  f"p99 {results[name]['latency_ms']['p99']:8.2f}ms  "
+                  f"errors {results[name]['errors']}", file=sys.stderr)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "config": {
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "pos_latency_ms": args.pos_latency_ms,
+            "pos_jitter_ms": args.pos_jitter_ms,
+            "pos_error_rate": args.pos_error_rate,
+            "menu_size": len(load_foods(args.menu_size)),
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression_pct: float) -> bool:
+    """Print per-endpoint deltas against a baseline report; False if p95 regressed too far"""
+    ok = True
+    print(f"\nComparing against {baseline.get('commit', 'unknown')[:12]}", file=sys.stderr)
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        old_p95, new_p95 = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        old_rps, new_rps = previous["requests_per_sec"], current["requests_per_sec"]
+        p95_delta = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0.0
+        rps_delta = (new_rps - old_rps) / old_rps * 100 if old_rps else 0.0
+        regressed = p95_delta > max_regression_pct
+        ok = ok and not regressed
+        print(f"{name:16s} p95 {old_p95:8.2f} -> {new_p95:8.2f}ms ({p95_delta:+6.1f}%)  "
+              f"req/s {old_rps:9.1f} -> {new_rps:9.1f} ({rps_delta:+6.1f}%)"
+              f"{'  REGRESSION' if regressed else ''}", file=sys.stderr)
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Kiosk backend load test against a local mock POS")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured warm-up seconds per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the backend")
+    parser.add_argument("--pos-latency-ms", type=float, default=50.0)
+    parser.add_argument("--pos-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--pos-error-rate", type=float, default=0.0)
+    parser.add_argument("--menu-size", type=int, default=0, help="Foods served by the mock POS (0 = fixture size)")
+    parser.add_argument("--verbose", action="store_true", help="Show mock POS and backend server logs")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression-pct", type=float, default=10.0,
+                        help="Fail when p95 latency regresses by more than this against --baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if not compare(report, baseline, args.max_regression_pct):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Per-request timing breakdown and opt-in sampling profiler.
+
+Handlers wrap interesting phases in ``span("name")``; the middleware collects
+them for the current request and emits a ``Server-Timing`` header, e.g.
+
+    Server-Timing: pos_menu;dur=212.4, transform;dur=8.1, serialize;dur=1.9, total;dur=224.0
+
+Profiling is off unless PROFILING_ENABLED is set. When enabled, a request is
+profiled if it sends ``X-Profile: 1`` or is picked by PROFILE_SAMPLE_RATE.
+Header-requested profiles are always written; sampled ones only when the
+request took at least PROFILE_SLOW_MS. Output goes to PROFILE_DIR in folded
+stack format ("frame;frame;frame count"), which flamegraph.pl, speedscope
+and inferno read directly.
+
+The sampler walks the event loop thread's stack, so a profile shows whatever
+the loop was running while the request was in flight - including other
+requests' work, which is usually exactly what explains a slow request.
+
+``monitor_loop_lag`` runs for the life of the process and measures how long
+the event loop is blocked, exporting it as ``kiosk_event_loop_lag_seconds``.
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from metrics import EVENT_LOOP_LAG, EVENT_LOOP_LAG_MAX
+
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '').lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', '500'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '1'))
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', '/tmp/kiosk-profiles'))
+LOOP_LAG_INTERVAL_MS = float(os.environ.get('LOOP_LAG_INTERVAL_MS', '100'))
+LOOP_LAG_WARN_MS = float(os.environ.get('LOOP_LAG_WARN_MS', '100'))
+LOOP_LAG_WINDOW_SECONDS = 10
+
+# Spans recorded for the request being served; None outside a request
+_current_spans: ContextVar[Optional[dict]] = ContextVar("server_timing_spans", default=None)
+
+
+class span:
+    """Record the wall time of the enclosed block under ``name`` for Server-Timing.
+
+    Usable as ``with`` or ``async with`` (so it can sit in the same statement as
+    an httpx client). Repeated spans with the same name within one request are
+    summed. Outside a request (background tasks, startup) this is a no-op.
+    """
+
+    __slots__ = ("name", "_spans", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._spans = _current_spans.get()
+        if self._spans is not None:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._spans is not None:
+            elapsed = (time.perf_counter() - self._start) * 1000
+            self._spans[self.name] = self._spans.get(self.name, 0.0) + elapsed
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def format_server_timing(spans: dict, total_ms: float) -> str:
+    entries = [f"{name};dur={duration:.1f}" for name, duration in spans.items()]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+class StackSampler:
+    """Background thread sampling one thread's Python stack at a fixed interval.
+
+    Several requests can be profiled at once; each registers its own Counter and
+    every sample is added to all registered counters. The thread only runs while
+    at least one collector is registered.
+    """
+
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._target_thread_id = None
+
+    def start(self, target_thread_id: int) -> Counter:
+        collector = Counter()
+        with self._lock:
+            self._collectors.append(collector)
+            self._target_thread_id = target_thread_id
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        return collector
+
+    def stop(self, collector: Counter) -> None:
+        with self._lock:
+            self._collectors.remove(collector)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._collectors:
+                    self._thread = None
+                    return
+                collectors = list(self._collectors)
+                target = self._target_thread_id
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                folded = ";".join(reversed(stack))
+                for collector in collectors:
+                    collector[folded] += 1
+            time.sleep(self.interval)
+
+
+sampler = StackSampler(PROFILE_INTERVAL_MS)
+
+
+def write_profile(samples: Counter, method: str, path: str, total_ms: float) -> Optional[Path]:
+    if not samples:
+        return None
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    slug = path.strip("/").replace("/", "_") or "root"
+    out = PROFILE_DIR / f"{stamp}-{method}-{slug}-{int(total_ms)}ms.folded"
+    out.write_text("".join(f"{stack} {count}\n" for stack, count in samples.most_common()))
+    return out
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware adding Server-Timing headers and optional profiles"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans = {}
+        token = _current_spans.set(spans)
+        start = time.perf_counter()
+
+        profile_requested = False
+        samples = None
+        if PROFILING_ENABLED:
+            profile_requested = any(k == b"x-profile" and v in (b"1", b"true") for k, v in scope["headers"])
+            if profile_requested or (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE):
+                samples = sampler.start(threading.get_ident())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(spans, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_spans.reset(token)
+            if samples is not None:
+                sampler.stop(samples)
+                total_ms = (time.perf_counter() - start) * 1000
+                if profile_requested or total_ms >= PROFILE_SLOW_MS:
+                    try:
+                        out = write_profile(samples, scope["method"], scope["path"], total_ms)
+                        if out:
+                            logger.info(f"Wrote profile for {scope['method']} {scope['path']} ({total_ms:.0f}ms) to {out}")
+                    except OSError as e:
+                        logger.error(f"Failed to write profile: {e}")
+
+
+async def monitor_loop_lag():
+    """Measure event loop lag until cancelled.
+
+    Sleeps for LOOP_LAG_INTERVAL_MS at a time; however much later than that the
+    loop wakes us is time it spent running synchronous code, during which no
+    other request made progress. Lags of LOOP_LAG_WARN_MS or more are logged.
+    """
+    interval = LOOP_LAG_INTERVAL_MS / 1000
+    window_start = time.monotonic()
+    window_max = 0.0
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(time.perf_counter() - start - interval, 0.0)
+        EVENT_LOOP_LAG.observe(lag)
+        now = time.monotonic()
+        if now - window_start >= LOOP_LAG_WINDOW_SECONDS:
+            window_start = now
+            window_max = 0.0
+        window_max = max(window_max, lag)
+        EVENT_LOOP_LAG_MAX.set(window_max)
+        if lag * 1000 >= LOOP_LAG_WARN_MS:
+            logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms")
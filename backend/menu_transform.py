@@ -0,0 +1,194 @@
+"""POS food -> kiosk menu item transformation.
+
+Kept free of server state so it can run in worker processes: large menus are
+split into chunks and each chunk goes through ``transform_chunk`` in a process
+pool (see build_menu_snapshot in server.py). Chunk results are merged in order,
+and the encoded JSON of each chunk is spliced rather than re-serialized, so a
+pooled build yields byte-for-byte the same bodies (and version) as an inline one.
+"""
+import json
+
+
+def transform_pos_food_to_menu_item(food: dict) -> dict:
+    """Transform POS food item to our MenuItem format"""
+    category = food.get("category", {})
+    
+    # Transform variations from POS format
+    variation_groups = []
+    for variation_group in food.get("variation", []):
+        if isinstance(variation_group, dict):
+            group_name = variation_group.get("name", "Choice")
+            group_type = variation_group.get("type", "single")
+            required = variation_group.get("required", "off") == "on"
+            min_select = variation_group.get("min", 0)
+            max_select = variation_group.get("max", 0)
+            
+            try:
+                min_select = int(min_select) if min_select else 0
+            except (ValueError, TypeError):
+                min_select = 0
+            try:
+                max_select = int(max_select) if max_select else 0
+            except (ValueError, TypeError):
+                max_select = 0
+            
+            values = variation_group.get("values", [])
+            group_options = []
+            for val in values:
+                if isinstance(val, dict):
+                    label = val.get("label", "")
+                    price_str = val.get("optionPrice", "0")
+                    try:
+                        price = float(price_str) if price_str else 0
+                    except (ValueError, TypeError):
+                        price = 0
+                    group_options.append({
+                        "id": f"{group_name}_{label}".replace(" ", "_").lower(),
+                        "name": label.upper(),
+                        "price": price
+                    })
+            if group_options:
+                variation_groups.append({
+                    "group_name": group_name.upper(),
+                    "type": "single" if group_type == "single" else "multiple",
+                    "required": required,
+                    "min_select": min_select,
+                    "max_select": max_select,
+                    "options": group_options
+                })
+    
+    # Transform addons as a separate group
+    addon_options = []
+    for addon in food.get("addons", []):
+        if isinstance(addon, dict):
+            addon_name = addon.get("name", "")
+            addon_price_str = addon.get("price", "0")
+            try:
+                addon_price = float(addon_price_str) if addon_price_str else 0
+            except (ValueError, TypeError):
+                addon_price = 0
+            addon_options.append({
+                "id": f"addon_{addon.get('id', '')}",
+                "name": addon_name.upper(),
+                "price": addon_price
+            })
+    
+    if addon_options:
+        variation_groups.append({
+            "group_name": "ADD-ONS",
+            "type": "multiple",
+            "required": False,
+            "min_select": 0,
+            "max_select": 0,
+            "options": addon_options
+        })
+    
+    # Flatten for backward compatibility
+    variations = []
+    for group in variation_groups:
+        variations.extend(group["options"])
+    
+    # Safely parse calories
+    kcal_value = food.get("kcal", 0)
+    try:
+        calories = int(float(kcal_value)) if kcal_value else 0
+    except (ValueError, TypeError):
+        calories = 0
+    
+    # Parse price fields
+    base_price = float(food.get("price", 0) or 0)
+    
+    # Parse discount
+    discount_value = food.get("discount", 0)
+    try:
+        discount = float(discount_value) if discount_value else 0
+    except (ValueError, TypeError):
+        discount = 0
+    
+    # Parse tax
+    tax_value = food.get("tax", 0)
+    try:
+        tax_percent = float(tax_value) if tax_value else 0
+    except (ValueError, TypeError):
+        tax_percent = 0
+    
+    # Check if item is complementary
+    is_complementary = str(food.get("complementary", "no")).lower() in ["yes", "true", "1"]
+    
+    # Calculate final price
+    if is_complementary:
+        final_price = 0
+        discount = 0
+        tax_amount = 0
+    else:
+        price_after_discount = base_price - discount
+        tax_amount = (price_after_discount * tax_percent) / 100
+        final_price = price_after_discount + tax_amount
+    
+    return {
+        "id": str(food.get("id", "")),
+        "name": food.get("name", ""),
+        "description": food.get("description", "") or "",
+        "price": round(final_price, 2),
+        "base_price": round(base_price, 2),
+        "is_complementary": is_complementary,
+        "discount": round(discount, 2),
+        "tax_percent": round(tax_percent, 2),
+        "tax_amount": round(tax_amount, 2) if not is_complementary else 0,
+        "image": food.get("image", ""),
+        "category": str(category.get("id", "")),
+        "category_name": category.get("name", ""),
+        "available": food.get("status", 1) == 1,
+        "variations": variations,
+        "variation_groups": variation_groups,
+        "calories": calories,
+        "portion_size": food.get("portion_size", "") or "",
+        "allergens": food.get("allergens", []) or []
+    }
+
+
+# Keys produced by transform_pos_food_to_menu_item, valid in ?fields=
+MENU_ITEM_FIELDS = (
+    "id", "name", "description", "price", "base_price", "is_complementary", "discount",
+    "tax_percent", "tax_amount", "image", "category", "category_name", "available",
+    "variations", "variation_groups", "calories", "portion_size", "allergens",
+)
+# Fields the kiosk grid needs to render a tile; everything else is fetched per item
+MENU_ITEM_SLIM_FIELDS = ("id", "name", "price", "is_complementary", "image", "category", "available")
+
+
+def encode_json(content) -> bytes:
+    """Encode like starlette's JSONResponse, so bodies match the regular responses"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def join_json_arrays(bodies) -> bytes:
+    """Concatenate encoded JSON arrays into one array without decoding them"""
+    return b"[" + b",".join(body[1:-1] for body in bodies if body != b"[]") + b"]"
+
+
+def extract_categories(pos_foods: list) -> dict:
+    """Categories of ``pos_foods`` (all foods, like the POS menu) by id, in first-seen order"""
+    categories = {}
+    for food in pos_foods:
+        cat = food.get("category", {})
+        cat_id = str(cat.get("id", ""))
+        cat_name = cat.get("name", "")
+        if cat_id and cat_name and cat_id not in categories:
+            categories[cat_id] = {
+                "id": cat_id,
+                "name": cat_name,
+                "image": food.get("image", "")
+            }
+    return categories
+
+
+def transform_chunk(pos_foods: list) -> tuple:
+    """Transform one slice of the POS menu.
+
+    Returns ``(items, slim_items, categories, items_body, slim_items_body)``
+    where only available foods become items and ``categories`` is keyed by id.
+    """
+    items = [transform_pos_food_to_menu_item(food) for food in pos_foods if food.get("status", 1) == 1]
+    slim_items = [{field: item[field] for field in MENU_ITEM_SLIM_FIELDS} for item in items]
+    return items, slim_items, extract_categories(pos_foods), encode_json(items), encode_json(slim_items)
@@ -0,0 +1,253 @@
+"""Prometheus metrics for the kiosk backend.
+
+All metric objects live here so that server.py (and any helper module) can
+record against them without creating duplicates in the default registry.
+
+Metrics are kept per process. Under ``uvicorn --workers N`` set
+PROMETHEUS_MULTIPROC_DIR to an empty directory (cleared before every start):
+each worker then writes its samples there and /metrics aggregates all workers,
+so a scrape no longer sees whichever worker happened to answer it.
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+METRICS_PATH = "/metrics"
+
+
+# Buckets tuned for a kiosk backend: most routes answer from cache in a few ms,
+# POS round trips sit in the 100ms - 5s range and time out at 30s.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# HTTP routes
+HTTP_REQUEST_DURATION = Histogram(
+    "kiosk_http_request_duration_seconds",
+    "Latency of HTTP requests by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "kiosk_http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "kiosk_http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# POS upstream
+POS_REQUEST_DURATION = Histogram(
+    "kiosk_pos_request_duration_seconds",
+    "Round-trip time of calls to the POS API by endpoint",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+POS_REQUEST_ERRORS = Counter(
+    "kiosk_pos_request_errors_total",
+    "Failed calls to the POS API by endpoint and reason (HTTP status or exception type)",
+    ["endpoint", "reason"],
+)
+POS_REQUESTS_IN_PROGRESS = Gauge(
+    "kiosk_pos_requests_in_progress",
+    "Calls to the POS API currently awaiting a response",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+
+# Caches (menu_cache, tables_cache, receipts)
+CACHE_EVENTS = Counter(
+    "kiosk_cache_events_total",
+    "Cache lookups and evictions by cache name and event (hit, miss, eviction)",
+    ["cache", "event"],
+)
+
+# Orders
+ORDERS_TOTAL = Counter(
+    "kiosk_orders_total",
+    "Orders by outcome (confirmed, failed, rejected before reaching the POS)",
+    ["outcome"],
+)
+
+# POS admission control (scheduler.py)
+POS_QUEUE_DEPTH = Gauge(
+    "kiosk_pos_queue_depth",
+    "POS-bound calls waiting for a slot by work class",
+    ["work_class"],
+    multiprocess_mode="livesum",
+)
+POS_QUEUE_WAIT = Histogram(
+    "kiosk_pos_queue_wait_seconds",
+    "Time POS-bound calls waited for a slot by work class",
+    ["work_class"],
+    buckets=LATENCY_BUCKETS,
+)
+POS_SHED_TOTAL = Counter(
+    "kiosk_pos_shed_total",
+    "POS-bound calls rejected with 429 because the class queue was full",
+    ["work_class"],
+)
+ORDER_RATE_LIMITED_TOTAL = Counter(
+    "kiosk_order_rate_limited_total",
+    "Order submissions rejected by the per-kiosk rate limit",
+)
+
+# Order status reconciler (order_status.py)
+ORDER_STATUS_RECONCILE_TOTAL = Counter(
+    "kiosk_order_status_reconcile_total",
+    "Reconciler passes by outcome (ok, idle, standby, failed)",
+    ["outcome"],
+)
+ORDER_STATUS_CHANGES_TOTAL = Counter(
+    "kiosk_order_status_changes_total",
+    "Order status changes picked up from the POS by new status",
+    ["status"],
+)
+ORDER_STATUS_WAITERS = Gauge(
+    "kiosk_order_status_waiters",
+    "Long-poll requests currently waiting for an order status change",
+    multiprocess_mode="livesum",
+)
+
+# Receipts (receipts.py)
+RECEIPTS_RENDERED_TOTAL = Counter(
+    "kiosk_receipts_rendered_total",
+    "Receipts rendered by format (cache hits are not counted)",
+    ["format"],
+)
+RECEIPT_RENDER_DURATION = Histogram(
+    "kiosk_receipt_render_duration_seconds",
+    "Time to render a receipt in the pool, including queueing, by format",
+    ["format"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Event loop health (instrumentation.monitor_loop_lag)
+EVENT_LOOP_LAG = Histogram(
+    "kiosk_event_loop_lag_seconds",
+    "How late the event loop woke a periodic timer, i.e. time it was blocked by synchronous work",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+EVENT_LOOP_LAG_MAX = Gauge(
+    "kiosk_event_loop_lag_max_seconds",
+    "Largest event loop lag seen in the current 10s window",
+    multiprocess_mode="livemax",
+)
+
+# Startup
+STARTUP_SECONDS = Gauge(
+    "kiosk_startup_seconds",
+    "Seconds from process start until the worker reported ready (including cache pre-warm)",
+    multiprocess_mode="liveall",
+)
+READY = Gauge(
+    "kiosk_ready",
+    "1 once the worker has finished startup and passes /api/health/ready",
+    multiprocess_mode="liveall",
+)
+
+
+@asynccontextmanager
+async def track_pos_call(endpoint: str):
+    """Time a POS call and count it as an error if it raises.
+
+    Non-200 responses are not exceptions; callers report those with
+    record_pos_error() so the reason carries the status code.
+    """
+    POS_REQUESTS_IN_PROGRESS.labels(endpoint).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        POS_REQUEST_ERRORS.labels(endpoint, type(e).__name__).inc()
+        raise
+    finally:
+        POS_REQUEST_DURATION.labels(endpoint).observe(time.perf_counter() - start)
+        POS_REQUESTS_IN_PROGRESS.labels(endpoint).dec()
+
+
+def record_pos_error(endpoint: str, status_code: int) -> None:
+    POS_REQUEST_ERRORS.labels(endpoint, str(status_code)).inc()
+
+
+def record_cache_event(cache: str, event: str) -> None:
+    CACHE_EVENTS.labels(cache, event).inc()
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight counts.
+
+    The route label is the matched route template (e.g. ``/api/orders``), read
+    from the scope after routing, so path parameters never leak into label
+    cardinality. The scrape endpoint (a plain route without a template) is
+    labelled ``/metrics``; requests that match no route are grouped under
+    ``<unmatched>``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) \
+                or (METRICS_PATH if scope["path"] == METRICS_PATH else "<unmatched>")
+            HTTP_REQUEST_DURATION.labels(method, route_path).observe(elapsed)
+            HTTP_REQUESTS_TOTAL.labels(method, route_path, str(status_code)).inc()
+
+
+def _collect() -> bytes:
+    if not MULTIPROC_DIR:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    # Multiprocess collection reads every worker's files; keep that off the loop
+    body = await run_in_threadpool(_collect) if MULTIPROC_DIR else _collect()
+    return Response(body, media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_exited() -> None:
+    """Drop this worker's live gauges from the multiprocess directory on shutdown"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
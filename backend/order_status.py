@@ -0,0 +1,193 @@
+"""Order status reconciliation and long-poll waiting.
+
+Once an order is confirmed by the POS, ``OrderStatusReconciler`` keeps its
+status in ``db.orders`` in step with the kitchen. Every ``interval`` seconds it
+fetches the statuses of the outlet's orders from the POS in a single call,
+maps them to kiosk statuses and applies the changes with one ``bulk_write``.
+Only one worker reconciles at a time: the loop runs under a lease in
+``db.cache_leases`` (see shared_cache.acquire_lease), so adding workers does not
+add POS traffic.
+
+``StatusWatchers`` lets ``GET /api/orders/{id}/status?wait=`` park until the
+order changes. The reconciler wakes waiters in its own worker directly; waiters
+in other workers re-read the order from the database every few seconds while
+they wait.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from metrics import ORDER_STATUS_CHANGES_TOTAL, ORDER_STATUS_RECONCILE_TOTAL, ORDER_STATUS_WAITERS
+from shared_cache import acquire_lease
+
+
+logger = logging.getLogger(__name__)
+
+# POS order_status values mapped to the statuses the kiosk shows
+POS_STATUS_MAP = {
+    "pending": "confirmed",
+    "confirmed": "confirmed",
+    "accepted": "confirmed",
+    "processing": "preparing",
+    "cooking": "preparing",
+    "preparing": "preparing",
+    "done": "ready",
+    "ready": "ready",
+    "handover": "ready",
+    "served": "completed",
+    "delivered": "completed",
+    "completed": "completed",
+    "paid": "completed",
+    "canceled": "cancelled",
+    "cancelled": "cancelled",
+    "rejected": "cancelled",
+    "failed": "cancelled",
+}
+OPEN_ORDER_STATUSES = ("confirmed", "preparing", "ready")
+
+# Fetches {pos_order_id: pos_status} for the outlet; None when the POS call failed
+StatusFetcher = Callable[[], Awaitable[Optional[dict]]]
+
+
+def map_pos_status(pos_status: Any) -> Optional[str]:
+    return POS_STATUS_MAP.get(str(pos_status).strip().lower()) if pos_status is not None else None
+
+
+def parse_pos_order_statuses(payload: Any) -> dict:
+    """``{pos_order_id: order_status}`` from a POS order list response.
+
+    The list may be the payload itself or sit under ``orders``, ``data`` or
+    ``data.orders``; entries carry ``id`` (or ``order_id``) and ``order_status``
+    (or ``status``).
+    """
+    orders = payload
+    if isinstance(orders, dict):
+        orders = orders.get("orders", orders.get("data"))
+    if isinstance(orders, dict):
+        orders = orders.get("orders")
+    statuses = {}
+    for order in orders or []:
+        if not isinstance(order, dict):
+            continue
+        order_id = order.get("id", order.get("order_id"))
+        status = order.get("order_status", order.get("status"))
+        if order_id is not None and status is not None:
+            statuses[str(order_id)] = status
+    return statuses
+
+
+class StatusWatchers:
+    """Futures of long-poll requests waiting for an order to change, by order id"""
+
+    def __init__(self):
+        self._waiters = {}
+
+    async def wait(self, order_id: str, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for notify(); True if woken by a change"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(order_id, set()).add(waiter)
+        ORDER_STATUS_WAITERS.inc()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            ORDER_STATUS_WAITERS.dec()
+            waiters = self._waiters.get(order_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[order_id]
+
+    def notify(self, order_ids: Iterable[str]) -> None:
+        for order_id in order_ids:
+            for waiter in self._waiters.pop(order_id, ()):
+                if not waiter.done():
+                    waiter.set_result(None)
+
+
+class OrderStatusReconciler:
+    def __init__(self, get_db: Callable[[], Any], fetch_statuses: StatusFetcher, watchers: StatusWatchers,
+                 interval_seconds: float = 10.0, max_age_hours: float = 12.0):
+        self.get_db = get_db
+        self.fetch_statuses = fetch_statuses
+        self.watchers = watchers
+        self.interval = interval_seconds
+        self.max_age = timedelta(hours=max_age_hours)
+        # Held for a few cycles so a stalled leader is replaced quickly
+        self.lease = timedelta(seconds=max(interval_seconds * 3, 30))
+
+    async def run(self) -> None:
+        """Reconcile every ``interval`` seconds until cancelled"""
+        logger.info(f"Order status reconciler started (every {self.interval:g}s)")
+        while True:
+            started = time.monotonic()
+            try:
+                if await acquire_lease(self.get_db().cache_leases, "order-status-reconciler", self.lease):
+                    await self.reconcile_once()
+                else:
+                    ORDER_STATUS_RECONCILE_TOTAL.labels("standby").inc()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ORDER_STATUS_RECONCILE_TOTAL.labels("failed").inc()
+                logger.error(f"Order status reconcile failed: {e}")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    async def reconcile_once(self) -> int:
+        """One pass over open orders; returns the number of orders whose status changed"""
+        orders = self.get_db().orders
+        cutoff = (datetime.now(timezone.utc) - self.max_age).isoformat()
+        open_orders = await orders.find(
+            {"status": {"$in": list(OPEN_ORDER_STATUSES)}, "pos_order_id": {"$ne": None},
+             "created_at": {"$gte": cutoff}},
+            {"_id": 0, "id": 1, "pos_order_id": 1, "status": 1, "pos_status": 1},
+        ).to_list(None)
+        if not open_orders:
+            ORDER_STATUS_RECONCILE_TOTAL.labels("idle").inc()
+            return 0
+
+        pos_statuses = await self.fetch_statuses()
+        if pos_statuses is None:
+            ORDER_STATUS_RECONCILE_TOTAL.labels("failed").inc()
+            return 0
+
+        now = datetime.now(timezone.utc).isoformat()
+        updates = []
+        changed = []
+        for order in open_orders:
+            pos_status = pos_statuses.get(str(order["pos_order_id"]))
+            status = map_pos_status(pos_status)
+            if status is None:
+                # Not in the POS response (or an unknown status): leave as is
+                continue
+            if status == order["status"] and pos_status == order.get("pos_status"):
+                continue
+            # Filter on the status we read so a concurrent writer is not overwritten
+            updates.append(UpdateOne(
+                {"id": order["id"], "status": order["status"]},
+                {"$set": {"status": status, "pos_status": pos_status, "status_updated_at": now}},
+            ))
+            if status != order["status"]:
+                changed.append((order["id"], status))
+
+        if updates:
+            try:
+                await orders.bulk_write(updates, ordered=False)
+            except PyMongoError as e:
+                ORDER_STATUS_RECONCILE_TOTAL.labels("failed").inc()
+                logger.error(f"Failed to write order statuses: {e}")
+                return 0
+            for _, status in changed:
+                ORDER_STATUS_CHANGES_TOTAL.labels(status).inc()
+            self.watchers.notify(order_id for order_id, _ in changed)
+        ORDER_STATUS_RECONCILE_TOTAL.labels("ok").inc()
+        if changed:
+            logger.info(f"Reconciled {len(open_orders)} open orders, {len(changed)} changed status")
+        return len(changed)
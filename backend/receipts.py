@@ -0,0 +1,264 @@
+"""Receipt rendering off the event loop.
+
+Receipts are rendered from an order dict (``Order.model_dump(mode="json")``)
+in two formats:
+
+text
+    Plain fixed-width text, for on-screen and digital receipts.
+escpos
+    The same layout as an ESC/POS byte stream for thermal printers (bold,
+    centred header, feed and partial cut).
+
+The layout is compiled once per receipt width into ``ReceiptTemplate`` (column
+widths baked into the format strings, printer commands pre-encoded), so a
+render is a handful of ``str.format`` calls. Rendering runs in a thread or
+process pool (RECEIPT_POOL), never on the event loop; results are kept in an
+LRU cache keyed by order id and format, and concurrent requests for the same
+receipt share one render. With RECEIPT_SPOOL_DIR set, the ESC/POS receipt of
+each new order (``render_in_background``) is written there once as
+``<order id>.bin`` for a print spooler to pick up; on-demand renders of old
+receipts never reach the printer.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import textwrap
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from metrics import RECEIPT_RENDER_DURATION, RECEIPTS_RENDERED_TOTAL, record_cache_event
+
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_FORMATS = ("text", "escpos")
+RECEIPT_WIDTH = int(os.environ.get('RECEIPT_WIDTH', '42'))  # 80mm paper, font B
+RECEIPT_TIMEZONE = os.environ.get('RECEIPT_TIMEZONE', 'Asia/Kolkata')
+
+# ESC/POS commands
+ESC_INIT = b"\x1b@"
+ESC_ALIGN_LEFT = b"\x1ba\x00"
+ESC_ALIGN_CENTER = b"\x1ba\x01"
+ESC_BOLD_ON = b"\x1bE\x01"
+ESC_BOLD_OFF = b"\x1bE\x00"
+ESC_DOUBLE_ON = b"\x1d!\x11"
+ESC_DOUBLE_OFF = b"\x1d!\x00"
+ESC_FEED_CUT = b"\x1bd\x04\x1dV\x01"
+
+
+def _local_timezone():
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(RECEIPT_TIMEZONE)
+    except Exception:
+        return timezone.utc
+
+
+class ReceiptTemplate:
+    """Receipt layout for one paper width, compiled once and reused for every render"""
+
+    AMOUNT_WIDTH = 10
+    QTY_WIDTH = 3
+
+    def __init__(self, width: int):
+        self.width = width
+        self.rule = "-" * width
+        self.name_width = width - self.QTY_WIDTH - 3 - self.AMOUNT_WIDTH
+        self.item_line = f"{{qty:>{self.QTY_WIDTH}}} x {{name:<{self.name_width}}}{{amount:>{self.AMOUNT_WIDTH}}}"
+        self.detail_line = f"{' ' * (self.QTY_WIDTH + 3)}{{text}}"
+        self.total_line = f"{{label:<{width - self.AMOUNT_WIDTH}}}{{amount:>{self.AMOUNT_WIDTH}}}"
+        self.detail_wrap = textwrap.TextWrapper(width=width - self.QTY_WIDTH - 3)
+        self.name_wrap = textwrap.TextWrapper(width=self.name_width)
+        self.timezone = _local_timezone()
+        self.escpos_header = ESC_INIT + ESC_ALIGN_CENTER + ESC_BOLD_ON + ESC_DOUBLE_ON
+        self.escpos_body = ESC_DOUBLE_OFF + ESC_BOLD_OFF
+        self.escpos_items = ESC_ALIGN_LEFT
+        self.escpos_total = ESC_BOLD_ON
+        self.escpos_footer = ESC_BOLD_OFF + ESC_ALIGN_CENTER
+        self.escpos_end = ESC_FEED_CUT
+
+    def sections(self, order: dict, restaurant_name: str):
+        """Receipt lines grouped as (header, info, items, totals, grand total line, footer)"""
+        header = [restaurant_name.center(self.width).rstrip()]
+
+        info = []
+        created_at = order.get("created_at")
+        if created_at:
+            try:
+                when = datetime.fromisoformat(str(created_at)).astimezone(self.timezone)
+                info.append(when.strftime("%d %b %Y  %I:%M %p"))
+            except ValueError:
+                pass
+        info.append(f"Order #{order.get('pos_order_id') or order.get('id')}")
+        info.append(f"Table {order.get('table_number', '')}")
+        if order.get("customer_name"):
+            info.append(f"Guest {order['customer_name']}")
+        info = [line.center(self.width).rstrip() for line in info]
+
+        items = [self.rule]
+        for item in order.get("items", []):
+            name_lines = self.name_wrap.wrap(item.get("name", "")) or [""]
+            amount = float(item.get("price", 0)) * int(item.get("quantity", 0))
+            items.append(self.item_line.format(qty=item.get("quantity", 0), name=name_lines[0], amount=f"{amount:.2f}"))
+            items.extend(self.detail_line.format(text=line) for line in name_lines[1:])
+            grouped = item.get("grouped_variations") or {}
+            choices = [f"{group}: {', '.join(labels)}" for group, labels in grouped.items() if labels]
+            if not choices and item.get("variations"):
+                choices = [", ".join(item["variations"])]
+            if item.get("special_instructions"):
+                choices.append(f"Note: {item['special_instructions']}")
+            for choice in choices:
+                items.extend(self.detail_line.format(text=line) for line in self.detail_wrap.wrap(choice))
+        items.append(self.rule)
+
+        totals = []
+        if order.get("subtotal") is not None:
+            totals.append(self.total_line.format(label="Subtotal", amount=f"{order['subtotal']:.2f}"))
+        if order.get("discount"):
+            label = f"Discount ({order['coupon_code']})" if order.get("coupon_code") else "Discount"
+            totals.append(self.total_line.format(label=label, amount=f"-{order['discount']:.2f}"))
+        if order.get("cgst"):
+            totals.append(self.total_line.format(label="CGST", amount=f"{order['cgst']:.2f}"))
+        if order.get("sgst"):
+            totals.append(self.total_line.format(label="SGST", amount=f"{order['sgst']:.2f}"))
+        grand_total = self.total_line.format(label="TOTAL (Rs.)", amount=f"{float(order.get('total', 0)):.2f}")
+
+        footer = ["Thank you!".center(self.width).rstrip()]
+        return header, info, items, totals, grand_total, footer
+
+    def render_text(self, order: dict, restaurant_name: str) -> bytes:
+        header, info, items, totals, grand_total, footer = self.sections(order, restaurant_name)
+        lines = header + info + items + totals + [grand_total, "", *footer]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def render_escpos(self, order: dict, restaurant_name: str) -> bytes:
+        header, info, items, totals, grand_total, footer = self.sections(order, restaurant_name)
+
+        def encode(lines) -> bytes:
+            return "".join(f"{line}\n" for line in lines).encode("cp437", errors="replace")
+
+        return b"".join((
+            self.escpos_header, encode(header),
+            self.escpos_body, encode(info),
+            self.escpos_items, encode(items), encode(totals),
+            self.escpos_total, encode([grand_total]),
+            self.escpos_footer, encode(["", *footer]),
+            self.escpos_end,
+        ))
+
+
+_templates = {}
+
+def render_receipt(order: dict, fmt: str, restaurant_name: str, width: int = RECEIPT_WIDTH) -> bytes:
+    """Render one receipt; module-level so it can run in a process pool"""
+    template = _templates.get(width)
+    if template is None:
+        template = _templates[width] = ReceiptTemplate(width)
+    if fmt == "escpos":
+        return template.render_escpos(order, restaurant_name)
+    return template.render_text(order, restaurant_name)
+
+
+def spool_receipt(spool_dir: str, order_id: str, data: bytes) -> Path:
+    """Write a receipt atomically so the spooler never picks up a partial file"""
+    directory = Path(spool_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{order_id}.bin"
+    partial = directory / f".{order_id}.bin.tmp"
+    partial.write_bytes(data)
+    partial.replace(target)
+    return target
+
+
+def build_executor() -> Executor:
+    """Pool selected by RECEIPT_POOL ("process" or "thread") with RECEIPT_WORKERS workers.
+
+    Rendering is pure Python, so in a thread it still holds the GIL and delays
+    the event loop; the process pool (default) keeps it off the loop entirely.
+    Workers are spawned rather than forked so they never inherit the server's
+    event loop, sockets or driver threads.
+    """
+    workers = int(os.environ.get('RECEIPT_WORKERS', '2'))
+    if os.environ.get('RECEIPT_POOL', 'process').lower() == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="receipt")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class ReceiptRenderer:
+    def __init__(self, executor: Executor, restaurant_name: str, cache_size: int = 512,
+                 spool_dir: Optional[str] = None):
+        self.executor = executor
+        self.restaurant_name = restaurant_name
+        self.cache_size = cache_size
+        self.spool_dir = spool_dir
+        self._cache = OrderedDict()
+        self._rendering = {}
+        self._background = set()
+
+    def cached(self, order_id: str, fmt: str) -> Optional[bytes]:
+        data = self._cache.get((order_id, fmt))
+        if data is not None:
+            self._cache.move_to_end((order_id, fmt))
+            record_cache_event("receipts", "hit")
+        return data
+
+    async def render(self, order: dict, fmt: str) -> bytes:
+        """Receipt for ``order`` in ``fmt`` from the cache, or rendered in the pool"""
+        key = (str(order["id"]), fmt)
+        data = self.cached(*key)
+        if data is not None:
+            return data
+        pending = self._rendering.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        record_cache_event("receipts", "miss")
+        future = asyncio.ensure_future(self._render(order, fmt))
+        self._rendering[key] = future
+        try:
+            data = await asyncio.shield(future)
+        finally:
+            self._rendering.pop(key, None)
+        self._cache[key] = data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            record_cache_event("receipts", "eviction")
+        return data
+
+    async def _render(self, order: dict, fmt: str) -> bytes:
+        start = time.perf_counter()
+        data = await asyncio.get_running_loop().run_in_executor(
+            self.executor, render_receipt, order, fmt, self.restaurant_name
+        )
+        RECEIPT_RENDER_DURATION.labels(fmt).observe(time.perf_counter() - start)
+        RECEIPTS_RENDERED_TOTAL.labels(fmt).inc()
+        return data
+
+    def render_in_background(self, order: dict) -> None:
+        """Pre-render a new order's receipts without delaying the caller.
+
+        This is the only path that spools: it runs once per placed order, while
+        ``render`` also serves reprints after a cache eviction or a restart.
+        """
+        async def render_all():
+            for fmt in RECEIPT_FORMATS:
+                try:
+                    data = await self.render(order, fmt)
+                    if self.spool_dir and fmt == "escpos":
+                        await asyncio.get_running_loop().run_in_executor(
+                            self.executor, spool_receipt, self.spool_dir, str(order["id"]), data
+                        )
+                except Exception as e:
+                    logger.error(f"Failed to render {fmt} receipt for order {order.get('id')}: {e}")
+
+        task = asyncio.create_task(render_all())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
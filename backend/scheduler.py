@@ -0,0 +1,173 @@
+"""Admission control for POS-bound work.
+
+Every call to the POS goes through ``pos_scheduler.slot(work_class)``. Each
+class (orders, tables, menu, login, status) has its own concurrency limit and
+bounded queue, and all classes share a global concurrency limit. When a slot
+frees up, waiters are admitted strictly by class priority (orders > tables >
+menu > login > status), so a burst of menu refreshes, logins or the background
+order status poll cannot delay order submissions. A class that is only at its
+own limit does not hold up the others. When a class's queue is full
+the call is shed immediately with 429 and a Retry-After estimate instead of
+piling up behind a slow POS.
+
+``OrderRateLimiter`` adds a per-kiosk token bucket in front of POST /api/orders.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from instrumentation import span
+from metrics import POS_QUEUE_DEPTH, POS_QUEUE_WAIT, POS_SHED_TOTAL
+
+
+# Highest priority first
+WORK_CLASSES = ("orders", "tables", "menu", "login", "status")
+
+DEFAULT_LIMITS = {
+    # class: (concurrency, max queued)
+    "orders": (8, 64),
+    "tables": (4, 32),
+    "menu": (4, 32),
+    "login": (2, 16),
+    "status": (1, 1),
+}
+
+
+class PosOverloaded(HTTPException):
+    """Raised when work is shed; FastAPI turns it into a 429 with Retry-After"""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class PosScheduler:
+    def __init__(self, max_concurrency: int, limits: dict):
+        self.max_concurrency = max_concurrency
+        self.limits = limits
+        self.running = {cls: 0 for cls in limits}
+        self.total_running = 0
+        self.queues = {cls: deque() for cls in limits}
+        # Smoothed time a slot is held per class, used for Retry-After estimates
+        self.service_time = {cls: 1.0 for cls in limits}
+
+    def _has_capacity(self, work_class: str) -> bool:
+        return self.total_running < self.max_concurrency and self.running[work_class] < self.limits[work_class][0]
+
+    def _must_queue(self, work_class: str) -> bool:
+        """Whether a new ``work_class`` call has to wait rather than start now.
+
+        It gives way to queued work of equal or higher priority only when that
+        work has room under its own class limit and is held back by the global
+        limit; work waiting on its own class limit does not hold up other
+        classes, the same rule ``_dispatch`` applies.
+        """
+        if not self._has_capacity(work_class):
+            return True
+        return any(
+            self.running[cls] < self.limits[cls][0] and any(not waiter.done() for waiter in self.queues[cls])
+            for cls in WORK_CLASSES[:WORK_CLASSES.index(work_class) + 1]
+        )
+
+    def _grant(self, work_class: str) -> None:
+        self.running[work_class] += 1
+        self.total_running += 1
+
+    def _release(self, work_class: str) -> None:
+        self.running[work_class] -= 1
+        self.total_running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to queued waiters, highest priority class first"""
+        for work_class in WORK_CLASSES:
+            queue = self.queues[work_class]
+            while queue and self._has_capacity(work_class):
+                waiter = queue.popleft()
+                if waiter.done():
+                    # Cancelled while queued
+                    continue
+                self._grant(work_class)
+                waiter.set_result(None)
+            POS_QUEUE_DEPTH.labels(work_class).set(len(queue))
+
+    def retry_after(self, work_class: str) -> int:
+        concurrency = self.limits[work_class][0]
+        backlog = len(self.queues[work_class]) + self.running[work_class]
+        return max(1, math.ceil(backlog * self.service_time[work_class] / concurrency))
+
+    @asynccontextmanager
+    async def slot(self, work_class: str):
+        queued_at = time.monotonic()
+        if not self._must_queue(work_class):
+            self._grant(work_class)
+        else:
+            queue = self.queues[work_class]
+            if len(queue) >= self.limits[work_class][1]:
+                POS_SHED_TOTAL.labels(work_class).inc()
+                raise PosOverloaded("Server is busy. Please try again.", self.retry_after(work_class))
+            waiter = asyncio.get_running_loop().create_future()
+            queue.append(waiter)
+            POS_QUEUE_DEPTH.labels(work_class).set(len(queue))
+            try:
+                with span("pos_queue"):
+                    await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Slot was granted just as we were cancelled: give it back
+                    self._release(work_class)
+                else:
+                    waiter.cancel()
+                    POS_QUEUE_DEPTH.labels(work_class).set(sum(not w.done() for w in queue))
+                raise
+
+        started = time.monotonic()
+        POS_QUEUE_WAIT.labels(work_class).observe(started - queued_at)
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            self.service_time[work_class] = 0.8 * self.service_time[work_class] + 0.2 * held
+            self._release(work_class)
+
+
+def build_scheduler() -> PosScheduler:
+    """Scheduler configured from POS_MAX_CONCURRENCY and POS_<CLASS>_CONCURRENCY / POS_<CLASS>_MAX_QUEUE"""
+    limits = {}
+    for work_class, (concurrency, max_queue) in DEFAULT_LIMITS.items():
+        prefix = f"POS_{work_class.upper()}"
+        limits[work_class] = (
+            int(os.environ.get(f"{prefix}_CONCURRENCY", concurrency)),
+            int(os.environ.get(f"{prefix}_MAX_QUEUE", max_queue)),
+        )
+    return PosScheduler(int(os.environ.get('POS_MAX_CONCURRENCY', '16')), limits)
+
+
+class OrderRateLimiter:
+    """Token bucket per kiosk: ``rate_per_minute`` sustained with bursts of ``burst`` (0 disables)"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.buckets = {}
+
+    def check(self, kiosk_id: str) -> None:
+        """Take one token for ``kiosk_id`` or raise 429 with the time until the next one"""
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        if len(self.buckets) > 10000:
+            # Forget kiosks whose bucket has fully refilled
+            idle = self.burst / self.rate
+            self.buckets = {k: v for k, v in self.buckets.items() if now - v[1] < idle}
+        tokens, updated = self.buckets.get(kiosk_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.buckets[kiosk_id] = (tokens, now)
+            retry_after = max(1, math.ceil((1 - tokens) / self.rate))
+            raise PosOverloaded("Too many orders from this kiosk. Please wait a moment.", retry_after)
+        self.buckets[kiosk_id] = (tokens - 1, now)
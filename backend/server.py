@@ -1,16 +1,56 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Header
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Request
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import base64
+import binascii
+import gzip
+import hashlib
+import json
 import logging
+import multiprocessing
+import time
+import traceback
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
+import re
 import uuid
 from datetime import datetime, timezone
 import httpx
+from concurrent.futures import ProcessPoolExecutor
 
+from metrics import (
+    METRICS_PATH,
+    ORDER_RATE_LIMITED_TOTAL,
+    ORDERS_TOTAL,
+    READY,
+    STARTUP_SECONDS,
+    PrometheusMiddleware,
+    mark_worker_exited,
+    metrics_endpoint,
+    record_cache_event,
+    record_pos_error,
+    track_pos_call,
+)
+from instrumentation import ServerTimingMiddleware, monitor_loop_lag, span
+from menu_transform import (
+    MENU_ITEM_FIELDS,
+    MENU_ITEM_SLIM_FIELDS,
+    encode_json,
+    join_json_arrays,
+    transform_chunk,
+)
+from shared_cache import build_cache
+from order_status import OrderStatusReconciler, StatusWatchers, parse_pos_order_statuses
+from receipts import RECEIPT_FORMATS, ReceiptRenderer, build_executor
+from scheduler import OrderRateLimiter, PosOverloaded, build_scheduler
+
+
+PROCESS_START = time.monotonic()
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -23,11 +63,55 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # POS API Configuration
-POS_API_BASE_URL = "https://preprod.mygenie.online/api/v1"
-POS_API_V2_URL = "https://preprod.mygenie.online/api/v2"
+POS_API_BASE_URL = os.environ.get('POS_API_BASE_URL', "https://preprod.mygenie.online/api/v1")
+POS_API_V2_URL = os.environ.get('POS_API_V2_URL', "https://preprod.mygenie.online/api/v2")
+
+# POS restaurant config - Hyatt Candolim
+POS_RESTAURANT_ID = "401"
+POS_RESTAURANT_NAME = "Hyatt"
+
+# Menu and table config are outlet-wide, so they are cached once per outlet for
+# 5 minutes and served to any token the POS has accepted. CACHE_BACKEND=mongo
+# shares the cache between uvicorn workers (see shared_cache.py).
+POS_CACHE_TTL_SECONDS = 300
+POS_CACHE_KEY = f"outlet-{POS_RESTAURANT_ID}"
+
+# Admission control for POS-bound work (see scheduler.py) and per-kiosk order rate
+# limit, off by default (ORDER_RATE_PER_MINUTE=0) until every kiosk sends X-Kiosk-Id
+pos_scheduler = build_scheduler()
+order_rate_limiter = OrderRateLimiter(
+    rate_per_minute=float(os.environ.get('ORDER_RATE_PER_MINUTE', '0')),
+    burst=int(os.environ.get('ORDER_RATE_BURST', '3')),
+)
+
+# One pooled client for every POS call: connections are kept alive between calls
+# and the TLS context is built once instead of per request
+pos_http = httpx.AsyncClient(timeout=30.0)
+
+# Optional POS service credential used to pre-warm caches at startup
+POS_SERVICE_EMAIL = os.environ.get('POS_SERVICE_EMAIL')
+POS_SERVICE_PASSWORD = os.environ.get('POS_SERVICE_PASSWORD')
+PREWARM_TIMEOUT_SECONDS = float(os.environ.get('PREWARM_TIMEOUT_SECONDS', '60'))
+
+# Background order status reconciliation (see order_status.py), off unless
+# ORDER_STATUS_POLL_SECONDS > 0. POS_ORDER_STATUS_PATH is the POS v2 call listing the
+# outlet's orders with their order_status; check it against the POS before enabling.
+# The poll authenticates as the service account; ORDER_STATUS_USE_KIOSK_TOKEN lets it
+# fall back to the session token of the last kiosk that placed an order.
+ORDER_STATUS_POLL_SECONDS = float(os.environ.get('ORDER_STATUS_POLL_SECONDS', '0'))
+ORDER_STATUS_USE_KIOSK_TOKEN = os.environ.get('ORDER_STATUS_USE_KIOSK_TOKEN', '').lower() in ("1", "true", "yes")
+ORDER_STATUS_MAX_AGE_HOURS = float(os.environ.get('ORDER_STATUS_MAX_AGE_HOURS', '12'))
+POS_ORDER_STATUS_PATH = os.environ.get('POS_ORDER_STATUS_PATH', '/vendoremployee/order/running-orders')
+ORDER_STATUS_MAX_WAIT_SECONDS = 30
+ORDER_STATUS_RECHECK_SECONDS = 2
+
+# Receipts are rendered off the event loop (see receipts.py); RECEIPT_SPOOL_DIR
+# additionally writes each new order's ESC/POS receipt to disk for a print spooler
+RECEIPT_SPOOL_DIR = os.environ.get('RECEIPT_SPOOL_DIR')
+RECEIPT_CACHE_SIZE = int(os.environ.get('RECEIPT_CACHE_SIZE', '512'))
 
 # Cache for menu data (token comes from user now)
-menu_cache = {"data": None, "expires": None, "token": None}
+menu_cache = build_cache("menu", POS_CACHE_TTL_SECONDS, lambda: db)
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
@@ -48,6 +132,57 @@ def get_token_from_header(authorization: Optional[str] = None) -> Optional[str]:
     return None
 
 
+# Tokens the POS has accepted (via login or a successful fetch), keyed by SHA-256
+# with an expiry. Cached outlet data is only served to these tokens; any other
+# token is checked against the POS first.
+TOKEN_VERIFY_TTL_SECONDS = 3600
+verified_tokens = {}
+
+def token_fingerprint(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def mark_token_verified(token: str) -> None:
+    now = time.monotonic()
+    if len(verified_tokens) > 1000:
+        for fingerprint, expires in list(verified_tokens.items()):
+            if expires <= now:
+                del verified_tokens[fingerprint]
+    verified_tokens[token_fingerprint(token)] = now + TOKEN_VERIFY_TTL_SECONDS
+
+def forget_token(token: str) -> None:
+    verified_tokens.pop(token_fingerprint(token), None)
+
+class PosTokenRejected(HTTPException):
+    """Raised when the POS answers 401 for a kiosk token; FastAPI turns it into a 401"""
+
+    def __init__(self):
+        super().__init__(status_code=401, detail="Session expired. Please log in again.")
+
+def is_token_verified(token: str) -> bool:
+    expires = verified_tokens.get(token_fingerprint(token))
+    return expires is not None and expires > time.monotonic()
+
+
+async def fetch_pos_data(cache, load, token: str, force_refresh: bool = False):
+    """Outlet-wide POS data from ``cache``, loaded with ``token`` when needed.
+
+    A token that has not been verified yet always goes to the POS once; a
+    successful response proves the token. The outlet snapshot is only replaced
+    when the POS returned something new, so a fresh entry keeps its derived
+    views (menu snapshot, table registry) across logins.
+    """
+    if not is_token_verified(token):
+        record_cache_event(cache.name, "miss")
+        data = await load(token)
+        if data is None:
+            return None
+        entry = cache.peek(POS_CACHE_KEY)
+        if entry is not None and entry.expires > datetime.now(timezone.utc) and entry.data == data:
+            return entry
+        return await cache.put(POS_CACHE_KEY, data)
+    return await cache.get(POS_CACHE_KEY, lambda: load(token), force_refresh)
+
+
 # Define Models
 class Variation(BaseModel):
     id: str
@@ -152,21 +287,15 @@ async def root():
 
 
 # POS Menu Integration Helper Functions
-async def fetch_pos_menu(token: str, force_refresh: bool = False):
-    """Fetch menu from POS API using the provided token"""
-    now = datetime.now(timezone.utc)
-    
-    # Check cache (cache for 5 minutes) - also check if same token
-    if not force_refresh and menu_cache["data"] and menu_cache["expires"] and menu_cache["expires"] > now and menu_cache["token"] == token:
-        return menu_cache["data"]
-    
-    if not token:
-        logger.warning("No POS token provided")
-        return None
-    
+async def load_pos_menu(token: str):
+    """Call the POS foods-list endpoint; returns the foods list or None on failure.
+
+    Raises PosTokenRejected when the POS does not accept ``token``.
+    """
+    rejected = False
     try:
-        async with httpx.AsyncClient() as client_http:
-            response = await client_http.get(
+        async with pos_scheduler.slot("menu"), track_pos_call("foods-list"), span("pos_menu"):
+            response = await pos_http.get(
                 f"{POS_API_V2_URL}/vendoremployee/product/foods-list?food_for=Normal",
                 headers={
                     "Authorization": f"Bearer {token}",
@@ -174,162 +303,119 @@ async def fetch_pos_menu(token: str, force_refresh: bool = False):
                 },
                 timeout=30.0
             )
+            if response.status_code != 200:
+                record_pos_error("foods-list", response.status_code)
             if response.status_code == 200:
                 data = response.json()
                 foods = data.get("foods", [])
-                
-                # Cache for 5 minutes
-                from datetime import timedelta
-                menu_cache["data"] = foods
-                menu_cache["expires"] = now + timedelta(minutes=5)
-                menu_cache["token"] = token
-                
+                mark_token_verified(token)
                 logger.info(f"Fetched {len(foods)} items from POS menu")
                 return foods
             elif response.status_code == 401:
                 logger.warning("POS token expired or invalid")
-                return None
+                forget_token(token)
+                rejected = True
+    except PosOverloaded:
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch POS menu: {e}")
+    if rejected:
+        raise PosTokenRejected()
     return None
 
 
-def transform_pos_food_to_menu_item(food: dict) -> dict:
-    """Transform POS food item to our MenuItem format"""
-    category = food.get("category", {})
-    
-    # Transform variations from POS format
-    variation_groups = []
-    for variation_group in food.get("variation", []):
-        if isinstance(variation_group, dict):
-            group_name = variation_group.get("name", "Choice")
-            group_type = variation_group.get("type", "single")
-            required = variation_group.get("required", "off") == "on"
-            min_select = variation_group.get("min", 0)
-            max_select = variation_group.get("max", 0)
-            
-            try:
-                min_select = int(min_select) if min_select else 0
-            except (ValueError, TypeError):
-                min_select = 0
-            try:
-                max_select = int(max_select) if max_select else 0
-            except (ValueError, TypeError):
-                max_select = 0
-            
-            values = variation_group.get("values", [])
-            group_options = []
-            for val in values:
-                if isinstance(val, dict):
-                    label = val.get("label", "")
-                    price_str = val.get("optionPrice", "0")
-                    try:
-                        price = float(price_str) if price_str else 0
-                    except (ValueError, TypeError):
-                        price = 0
-                    group_options.append({
-                        "id": f"{group_name}_{label}".replace(" ", "_").lower(),
-                        "name": label.upper(),
-                        "price": price
-                    })
-            if group_options:
-                variation_groups.append({
-                    "group_name": group_name.upper(),
-                    "type": "single" if group_type == "single" else "multiple",
-                    "required": required,
-                    "min_select": min_select,
-                    "max_select": max_select,
-                    "options": group_options
-                })
-    
-    # Transform addons as a separate group
-    addon_options = []
-    for addon in food.get("addons", []):
-        if isinstance(addon, dict):
-            addon_name = addon.get("name", "")
-            addon_price_str = addon.get("price", "0")
-            try:
-                addon_price = float(addon_price_str) if addon_price_str else 0
-            except (ValueError, TypeError):
-                addon_price = 0
-            addon_options.append({
-                "id": f"addon_{addon.get('id', '')}",
-                "name": addon_name.upper(),
-                "price": addon_price
-            })
-    
-    if addon_options:
-        variation_groups.append({
-            "group_name": "ADD-ONS",
-            "type": "multiple",
-            "required": False,
-            "min_select": 0,
-            "max_select": 0,
-            "options": addon_options
-        })
-    
-    # Flatten for backward compatibility
-    variations = []
-    for group in variation_groups:
-        variations.extend(group["options"])
-    
-    # Safely parse calories
-    kcal_value = food.get("kcal", 0)
-    try:
-        calories = int(float(kcal_value)) if kcal_value else 0
-    except (ValueError, TypeError):
-        calories = 0
-    
-    # Parse price fields
-    base_price = float(food.get("price", 0) or 0)
-    
-    # Parse discount
-    discount_value = food.get("discount", 0)
-    try:
-        discount = float(discount_value) if discount_value else 0
-    except (ValueError, TypeError):
-        discount = 0
+MENU_PAGE_MAX_LIMIT = 500
+
+# Menus with at least MENU_POOL_THRESHOLD foods are transformed in a process pool,
+# MENU_POOL_CHUNK_SIZE foods per task, so a large refresh never stalls the event loop
+MENU_POOL_THRESHOLD = int(os.environ.get('MENU_POOL_THRESHOLD', '1000'))
+MENU_POOL_CHUNK_SIZE = int(os.environ.get('MENU_POOL_CHUNK_SIZE', '250'))
+# Spawned on first use; spawn (not fork) so workers never inherit the loop or sockets
+menu_pool = ProcessPoolExecutor(
+    max_workers=int(os.environ.get('MENU_POOL_WORKERS', min(4, os.cpu_count() or 1))),
+    mp_context=multiprocessing.get_context("spawn"),
+)
+
+
+class MenuSnapshot:
+    """Kiosk view of one POS menu version, built once per menu refresh.
+
+    Holds the transformed available items in full and slim form (also grouped
+    by category and indexed by id), the categories sorted by name, and the
+    encoded JSON bodies of the unfiltered responses, so cache-hit requests skip
+    transformation and serialization. ``version`` is a content hash, so every
+    worker derives the same one from the same menu.
     
-    # Parse tax
-    tax_value = food.get("tax", 0)
-    try:
-        tax_percent = float(tax_value) if tax_value else 0
-    except (ValueError, TypeError):
-        tax_percent = 0
-    
-    # Check if item is complementary
-    is_complementary = str(food.get("complementary", "no")).lower() in ["yes", "true", "1"]
-    
-    # Calculate final price
-    if is_complementary:
-        final_price = 0
-        discount = 0
-        tax_amount = 0
+    Built from the ``transform_chunk`` results of consecutive slices of the
+    POS menu (a single chunk for small menus).
+    """
+
+    def __init__(self, chunks: list):
+        self.items = []
+        self.slim_items = []
+        categories_dict = {}
+        for items, slim_items, categories, _, _ in chunks:
+            self.items.extend(items)
+            self.slim_items.extend(slim_items)
+            for cat_id, category in categories.items():
+                categories_dict.setdefault(cat_id, category)
+        self.by_id = {item["id"]: item for item in self.items}
+        self.by_category = {}
+        self.slim_by_category = {}
+        for item, slim in zip(self.items, self.slim_items):
+            self.by_category.setdefault(item["category"], []).append(item)
+            self.slim_by_category.setdefault(item["category"], []).append(slim)
+        self.categories = sorted(categories_dict.values(), key=lambda x: x["name"])
+        
+        with span("serialize"):
+            self.items_body = join_json_arrays(chunk[3] for chunk in chunks)
+            self.slim_items_body = join_json_arrays(chunk[4] for chunk in chunks)
+            self.categories_body = encode_json(self.categories)
+        self.version = hashlib.sha1(self.items_body + self.categories_body).hexdigest()[:16]
+
+
+async def build_menu_snapshot(pos_foods: list) -> MenuSnapshot:
+    """Transform the POS menu inline when small, or chunked across the process pool"""
+    if len(pos_foods) < MENU_POOL_THRESHOLD:
+        with span("transform"):
+            chunks = [transform_chunk(pos_foods)]
     else:
-        price_after_discount = base_price - discount
-        tax_amount = (price_after_discount * tax_percent) / 100
-        final_price = price_after_discount + tax_amount
-    
-    return {
-        "id": str(food.get("id", "")),
-        "name": food.get("name", ""),
-        "description": food.get("description", "") or "",
-        "price": round(final_price, 2),
-        "base_price": round(base_price, 2),
-        "is_complementary": is_complementary,
-        "discount": round(discount, 2),
-        "tax_percent": round(tax_percent, 2),
-        "tax_amount": round(tax_amount, 2) if not is_complementary else 0,
-        "image": food.get("image", ""),
-        "category": str(category.get("id", "")),
-        "category_name": category.get("name", ""),
-        "available": food.get("status", 1) == 1,
-        "variations": variations,
-        "variation_groups": variation_groups,
-        "calories": calories,
-        "portion_size": food.get("portion_size", "") or "",
-        "allergens": food.get("allergens", []) or []
-    }
+        with span("transform_pool"):
+            loop = asyncio.get_running_loop()
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(menu_pool, transform_chunk, pos_foods[i:i + MENU_POOL_CHUNK_SIZE])
+                for i in range(0, len(pos_foods), MENU_POOL_CHUNK_SIZE)
+            ))
+    with span("merge"):
+        return MenuSnapshot(chunks)
+
+
+async def get_menu_snapshot(entry) -> MenuSnapshot:
+    """Snapshot for a menu cache entry, built on first use and kept until the entry is replaced"""
+    snapshot = entry.derived.get("snapshot")
+    if snapshot is None:
+        # Concurrent first requests share one build
+        building = entry.derived.get("building")
+        if building is None:
+            building = entry.derived["building"] = asyncio.ensure_future(build_menu_snapshot(entry.data))
+        try:
+            snapshot = await asyncio.shield(building)
+        except Exception:
+            entry.derived.pop("building", None)
+            raise
+        entry.derived["snapshot"] = snapshot
+    return snapshot
+
+
+async def fetch_menu_snapshot(token: str, force_refresh: bool = False) -> Optional[MenuSnapshot]:
+    """Fetch menu from POS API using the provided token (served from cache when fresh)"""
+    if not token:
+        logger.warning("No POS token provided")
+        return None
+    entry = await fetch_pos_data(menu_cache, load_pos_menu, token, force_refresh)
+    if not entry or not entry.data:
+        return None
+    return await get_menu_snapshot(entry)
 
 
 @api_router.get("/menu/categories")
@@ -340,68 +426,129 @@ async def get_categories(authorization: Optional[str] = Header(None)):
     if not token:
         raise HTTPException(status_code=401, detail="Authorization token required")
     
-    pos_foods = await fetch_pos_menu(token)
+    snapshot = await fetch_menu_snapshot(token)
     
-    if not pos_foods:
+    if not snapshot:
         raise HTTPException(status_code=503, detail="Unable to fetch menu from POS")
     
-    # Extract unique categories from POS data
-    categories_dict = {}
-    for food in pos_foods:
-        cat = food.get("category", {})
-        cat_id = str(cat.get("id", ""))
-        cat_name = cat.get("name", "")
-        if cat_id and cat_name and cat_id not in categories_dict:
-            categories_dict[cat_id] = {
-                "id": cat_id,
-                "name": cat_name,
-                "image": food.get("image", "")
-            }
-    
-    # Return sorted by name
-    return sorted(categories_dict.values(), key=lambda x: x["name"])
+    return Response(snapshot.categories_body, media_type="application/json")
+
+
+def parse_menu_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Validate ``?fields=``; None means the full item. "slim" selects the grid fields."""
+    if not fields:
+        return None
+    if fields == "slim":
+        return MENU_ITEM_SLIM_FIELDS
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    if not requested:
+        raise HTTPException(status_code=400, detail="fields must name at least one field")
+    unknown = sorted(requested.difference(MENU_ITEM_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Canonical order, so the same set of fields always gives the same projection
+    return tuple(field for field in MENU_ITEM_FIELDS if field in requested)
+
+
+def encode_menu_cursor(version: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_menu_cursor(cursor: str, version: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_version, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_version != version:
+        raise HTTPException(status_code=409, detail="Menu has changed. Please reload from the first page.")
+    return max(offset, 0)
 
 
 @api_router.get("/menu/items")
-async def get_menu_items(category: Optional[str] = None, authorization: Optional[str] = Header(None)):
-    """Get menu items from POS API - requires authentication"""
+async def get_menu_items(category: Optional[str] = None, fields: Optional[str] = None,
+                         limit: Optional[int] = None, cursor: Optional[str] = None,
+                         authorization: Optional[str] = Header(None)):
+    """Get menu items from POS API - requires authentication.
+    
+    ``fields`` projects each item to a comma-separated field list (``fields=slim``
+    for the grid view). ``limit`` switches to a paged response
+    ``{"items", "next_cursor", "version"}``; pass ``next_cursor`` back as ``cursor``.
+    """
     token = get_token_from_header(authorization)
     
     if not token:
         raise HTTPException(status_code=401, detail="Authorization token required")
     
-    pos_foods = await fetch_pos_menu(token)
+    projection = parse_menu_fields(fields)
+    if limit is not None and not 1 <= limit <= MENU_PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MENU_PAGE_MAX_LIMIT}")
+    if cursor and limit is None:
+        raise HTTPException(status_code=400, detail="cursor requires limit")
     
-    if not pos_foods:
+    snapshot = await fetch_menu_snapshot(token)
+    
+    if not snapshot:
         raise HTTPException(status_code=503, detail="Unable to fetch menu from POS")
     
-    # Transform POS foods to our format
-    items = [transform_pos_food_to_menu_item(food) for food in pos_foods if food.get("status", 1) == 1]
+    slim = projection == MENU_ITEM_SLIM_FIELDS
+    if limit is None and not category and projection is None:
+        return Response(snapshot.items_body, media_type="application/json")
+    if limit is None and not category and slim:
+        return Response(snapshot.slim_items_body, media_type="application/json")
     
     if category:
-        items = [item for item in items if item["category"] == category]
+        items = (snapshot.slim_by_category if slim else snapshot.by_category).get(category, [])
+    else:
+        items = snapshot.slim_items if slim else snapshot.items
     
-    return items
-
+    next_cursor = None
+    if limit is not None:
+        offset = decode_menu_cursor(cursor, snapshot.version) if cursor else 0
+        items = items[offset:offset + limit]
+        if offset + limit < len(snapshot.by_category.get(category, []) if category else snapshot.items):
+            next_cursor = encode_menu_cursor(snapshot.version, offset + limit)
+    
+    with span("serialize"):
+        if projection is not None and not slim:
+            items = [{field: item[field] for field in projection if field in item} for item in items]
+        if limit is None:
+            return JSONResponse(items)
+        return JSONResponse({"items": items, "next_cursor": next_cursor, "version": snapshot.version})
 
-# Tables cache
-tables_cache = {"data": None, "expires": None, "token": None}
 
-async def fetch_pos_tables(token: str):
-    """Fetch tables from POS API using the provided token"""
-    now = datetime.now(timezone.utc)
-    
-    # Check cache (cache for 5 minutes)
-    if tables_cache["data"] and tables_cache["expires"] and tables_cache["expires"] > now and tables_cache["token"] == token:
-        return tables_cache["data"]
+@api_router.get("/menu/items/{item_id}")
+async def get_menu_item(item_id: str, authorization: Optional[str] = Header(None)):
+    """Get one menu item with all details (variation groups, description, ...)"""
+    token = get_token_from_header(authorization)
     
     if not token:
-        logger.warning("No POS token available for tables")
-        return None
+        raise HTTPException(status_code=401, detail="Authorization token required")
     
+    snapshot = await fetch_menu_snapshot(token)
+    
+    if not snapshot:
+        raise HTTPException(status_code=503, detail="Unable to fetch menu from POS")
+    
+    item = snapshot.by_id.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    return JSONResponse(item)
+
+
+# Tables cache
+tables_cache = build_cache("tables", POS_CACHE_TTL_SECONDS, lambda: db)
+
+async def load_pos_tables(token: str):
+    """Call the POS table-config endpoint; returns the tables list or None on failure.
+
+    Raises PosTokenRejected when the POS does not accept ``token``.
+    """
+    rejected = False
     try:
-        async with httpx.AsyncClient() as client_http:
-            response = await client_http.get(
+        async with pos_scheduler.slot("tables"), track_pos_call("table-config"), span("pos_tables"):
+            response = await pos_http.get(
                 f"{POS_API_V2_URL}/vendoremployee/restaurant-settings/table-config",
                 headers={
                     "Authorization": f"Bearer {token}",
@@ -409,64 +556,117 @@ async def fetch_pos_tables(token: str):
                 },
                 timeout=30.0
             )
+            if response.status_code != 200:
+                record_pos_error("table-config", response.status_code)
             if response.status_code == 200:
                 data = response.json()
                 tables = data.get("data", {}).get("tables", [])
-                
-                # Cache for 5 minutes
-                from datetime import timedelta
-                tables_cache["data"] = tables
-                tables_cache["expires"] = now + timedelta(minutes=5)
-                tables_cache["token"] = token
-                
+                mark_token_verified(token)
                 logger.info(f"Fetched {len(tables)} tables from POS")
                 return tables
             elif response.status_code == 401:
                 logger.warning("POS token expired or invalid for tables")
-                return None
+                forget_token(token)
+                rejected = True
+    except PosOverloaded:
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch POS tables: {e}")
+    if rejected:
+        raise PosTokenRejected()
     return None
 
 
+def natural_sort_key(value: str):
+    """Sort key that orders embedded numbers numerically ("2" < "10", "T2" < "T10")"""
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part.lower())
+            for part in re.split(r"(\d+)", str(value)) if part]
+
+
+class TableRegistry:
+    """Kiosk view of the POS table config, built once per table-config refresh.
+
+    Only active tables (rtype "TB") are included; rooms (RM) are not orderable
+    from the kiosk. Holds the naturally ordered list served by GET /api/tables,
+    id and table_no lookups used to validate orders, and section (title) and
+    waiter groupings. ``version`` is a content hash of the table list.
+    """
+
+    def __init__(self, pos_tables: list):
+        tables = []
+        for table in pos_tables:
+            if table.get("status") == 1 and table.get("rtype") == "TB":
+                tables.append({
+                    "id": str(table.get("id")),
+                    "table_no": table.get("table_no", ""),
+                    "title": table.get("title", ""),
+                    "waiter": f"{table.get('f_name', '') or ''} {table.get('l_name', '') or ''}".strip()
+                })
+        tables.sort(key=lambda x: natural_sort_key(x["table_no"]))
+        
+        self.tables = tables
+        self.version = hashlib.sha1(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:16]
+        self.by_id = {t["id"]: t for t in tables}
+        self.by_table_no = {t["table_no"]: t for t in tables}
+        self.groups = {
+            "section": self._group_by("title"),
+            "waiter": self._group_by("waiter"),
+        }
+
+    def _group_by(self, field: str) -> list:
+        groups = {}
+        for table in self.tables:
+            groups.setdefault(table[field] or "", []).append(table)
+        # Named groups in natural order, unnamed group last (matches the kiosk UI)
+        names = sorted(groups, key=lambda name: (name == "", natural_sort_key(name)))
+        return [{"name": name, "tables": groups[name]} for name in names]
+
+
+def get_table_registry(entry) -> TableRegistry:
+    """Registry for a tables cache entry, built on first use and kept until the entry is replaced"""
+    registry = entry.derived.get("registry")
+    if registry is None:
+        registry = entry.derived["registry"] = TableRegistry(entry.data)
+    return registry
+
+
+async def fetch_table_registry(token: str) -> Optional[TableRegistry]:
+    """Fetch tables from POS API using the provided token (served from cache when fresh)"""
+    if not token:
+        logger.warning("No POS token available for tables")
+        return None
+    entry = await fetch_pos_data(tables_cache, load_pos_tables, token)
+    return get_table_registry(entry) if entry else None
+
+
 @api_router.get("/tables")
-async def get_tables(authorization: Optional[str] = Header(None)):
-    """Get tables from POS API - requires authentication"""
+async def get_tables(group_by: Optional[str] = None, authorization: Optional[str] = Header(None)):
+    """Get tables from POS API - requires authentication.
+    
+    ``group_by=section`` (table title) or ``group_by=waiter`` adds a ``groups`` list.
+    """
     token = get_token_from_header(authorization)
     
     if not token:
         raise HTTPException(status_code=401, detail="Authorization token required")
     
-    pos_tables = await fetch_pos_tables(token)
+    if group_by is not None and group_by not in ("section", "waiter"):
+        raise HTTPException(status_code=400, detail="group_by must be 'section' or 'waiter'")
     
-    if not pos_tables:
-        raise HTTPException(status_code=503, detail="Unable to fetch tables from POS")
+    registry = await fetch_table_registry(token)
     
-    # Transform to simplified format - only include Tables (rtype = "TB"), not Rooms (RM)
-    tables = []
-    for table in pos_tables:
-        if table.get("status") == 1 and table.get("rtype") == "TB":
-            tables.append({
-                "id": str(table.get("id")),
-                "table_no": table.get("table_no", ""),
-                "title": table.get("title", ""),
-                "waiter": f"{table.get('f_name', '') or ''} {table.get('l_name', '') or ''}".strip()
-            })
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Unable to fetch tables from POS")
     
-    # Sort tables by table_no
-    tables.sort(key=lambda x: x["table_no"])
-    return {"tables": tables, "source": "pos"}
-
-
-# POS restaurant config - Hyatt Candolim
-POS_RESTAURANT_ID = "401"
-POS_RESTAURANT_NAME = "Hyatt"
+    response = {"tables": registry.tables, "source": "pos"}
+    if group_by:
+        response["groups"] = registry.groups[group_by]
+    with span("serialize"):
+        return JSONResponse(response)
 
 
 async def send_order_to_pos(order: Order, order_input: OrderCreate, token: str) -> dict:
     """Send order to POS API using buffet-place-order endpoint"""
-    import json
-    
     if not token:
         logger.warning("No POS token available for order submission")
         return {"success": False, "error": "No POS token"}
@@ -528,10 +728,11 @@ async def send_order_to_pos(order: Order, order_input: OrderCreate, token: str)
             "cart": pos_cart
         }
         
-        logger.info(f"POS Buffet Order Payload: {json.dumps(pos_data, indent=2)}")
+        with span("log_payload"):
+            logger.info(f"POS Buffet Order Payload: {json.dumps(pos_data, indent=2)}")
         
-        async with httpx.AsyncClient() as client_http:
-            response = await client_http.post(
+        async with pos_scheduler.slot("orders"), track_pos_call("buffet-place-order"), span("pos_order"):
+            response = await pos_http.post(
                 f"{POS_API_V2_URL}/vendoremployee/buffet/buffet-place-order",
                 data={"data": json.dumps(pos_data)},
                 headers={
@@ -540,6 +741,8 @@ async def send_order_to_pos(order: Order, order_input: OrderCreate, token: str)
                 },
                 timeout=30.0
             )
+            if response.status_code != 200:
+                record_pos_error("buffet-place-order", response.status_code)
             
             logger.info(f"POS Buffet Order Response Status: {response.status_code}")
             
@@ -560,20 +763,53 @@ async def send_order_to_pos(order: Order, order_input: OrderCreate, token: str)
                 logger.error(f"POS Buffet Order Failed: Status {response.status_code}")
                 return {"success": False, "error": str(result), "status_code": response.status_code}
                 
+    except PosOverloaded:
+        raise
     except Exception as e:
         logger.error(f"POS Order Error: {e}")
-        import traceback
         logger.error(f"POS Order Traceback: {traceback.format_exc()}")
         return {"success": False, "error": str(e)}
 
 
+def get_kiosk_id(token: str, x_kiosk_id: Optional[str]) -> str:
+    """Rate-limit key for the submitting kiosk, scoped to its POS session.
+
+    Kiosks send a stable X-Kiosk-Id (kept in localStorage by the frontend);
+    without one every kiosk on the same session shares one bucket. Client
+    addresses are not used: X-Forwarded-For is client-controlled and kiosks
+    behind one NAT share an address.
+    """
+    session = token_fingerprint(token)[:16]
+    if x_kiosk_id:
+        return f"{session}:{x_kiosk_id.strip()[:64]}"
+    return session
+
+
 @api_router.post("/orders")
-async def create_order(order_input: OrderCreate, authorization: Optional[str] = Header(None)):
+async def create_order(order_input: OrderCreate,
+                       authorization: Optional[str] = Header(None),
+                       x_kiosk_id: Optional[str] = Header(None)):
     token = get_token_from_header(authorization)
     
     if not token:
         raise HTTPException(status_code=401, detail="Authorization token required")
     
+    try:
+        order_rate_limiter.check(get_kiosk_id(token, x_kiosk_id))
+    except PosOverloaded:
+        ORDER_RATE_LIMITED_TOTAL.inc()
+        raise
+    
+    # Reject unknown tables up front using the cached registry (no POS call); an
+    # outlet without active tables in the registry is left to the POS to validate
+    if order_input.table_id:
+        tables_entry = tables_cache.peek(POS_CACHE_KEY)
+        registry = get_table_registry(tables_entry) if tables_entry else None
+        if registry and registry.tables and str(order_input.table_id) not in registry.by_id:
+            logger.warning(f"Order rejected: unknown table_id {order_input.table_id}")
+            ORDERS_TOTAL.labels("rejected").inc()
+            raise HTTPException(status_code=400, detail="Selected table is not available. Please choose another table.")
+    
     # Send order to POS API
     order = Order(**order_input.model_dump())
     pos_result = await send_order_to_pos(order, order_input, token)
@@ -593,7 +829,12 @@ async def create_order(order_input: OrderCreate, authorization: Optional[str] =
         order_dict = order.model_dump()
         order_dict['created_at'] = order_dict['created_at'].isoformat()
         order_dict['pos_sync_result'] = pos_result
-        await db.orders.insert_one(order_dict)
+        with span("db_write"):
+            await db.orders.insert_one(order_dict)
+        ORDERS_TOTAL.labels("confirmed").inc()
+        if ORDER_STATUS_USE_KIOSK_TOKEN:
+            pos_tokens["last_order"] = token
+        receipt_renderer.render_in_background(order.model_dump(mode="json"))
         
         logger.info(f"Order placed successfully, POS Order ID: {order.pos_order_id or order.id}")
         return order
@@ -611,14 +852,237 @@ async def create_order(order_input: OrderCreate, authorization: Optional[str] =
             detail = "Failed to place order. Please try again."
         
         logger.error(f"Order failed: {error_msg}")
+        ORDERS_TOTAL.labels("failed").inc()
         raise HTTPException(status_code=503, detail=detail)
 
+# Order status: polled from the POS in the background, long-polled by kiosks
+order_watchers = StatusWatchers()
+# Tokens the status poll can use: the service account's, else (only with
+# ORDER_STATUS_USE_KIOSK_TOKEN) the last one that placed an order
+pos_tokens = {"service": None, "last_order": None}
+
+async def load_pos_order_statuses() -> Optional[dict]:
+    """Call the POS order list for the outlet; returns {pos_order_id: order_status} or None on failure"""
+    token = pos_tokens["service"]
+    if not token and POS_SERVICE_EMAIL and POS_SERVICE_PASSWORD:
+        token = await login_service_account()
+    token = token or pos_tokens["last_order"]
+    if not token:
+        logger.warning("No POS token available for order status polling")
+        return None
+    
+    try:
+        async with pos_scheduler.slot("status"), track_pos_call("order-status"):
+            response = await pos_http.get(
+                f"{POS_API_V2_URL}{POS_ORDER_STATUS_PATH}",
+                params={"restaurant_id": POS_RESTAURANT_ID},
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "application/json"
+                },
+                timeout=30.0
+            )
+            if response.status_code != 200:
+                record_pos_error("order-status", response.status_code)
+            if response.status_code == 200:
+                return parse_pos_order_statuses(response.json())
+            elif response.status_code == 401:
+                logger.warning("POS token expired or invalid for order status")
+                for name, known in pos_tokens.items():
+                    if known == token:
+                        pos_tokens[name] = None
+    except PosOverloaded:
+        logger.info("Order status poll shed, POS is busy")
+    except Exception as e:
+        logger.error(f"Failed to fetch POS order statuses: {e}")
+    return None
+
+
+order_reconciler = OrderStatusReconciler(
+    lambda: db, load_pos_order_statuses, order_watchers,
+    interval_seconds=ORDER_STATUS_POLL_SECONDS, max_age_hours=ORDER_STATUS_MAX_AGE_HOURS,
+)
+
+
+async def find_order_status(order_id: str) -> Optional[dict]:
+    return await db.orders.find_one(
+        {"id": order_id}, {"_id": 0, "id": 1, "status": 1, "pos_status": 1, "status_updated_at": 1}
+    )
+
+
+@api_router.get("/orders/{order_id}/status")
+async def get_order_status(order_id: str, wait: float = 0, since: Optional[str] = None,
+                           authorization: Optional[str] = Header(None)):
+    """Current status of an order - requires authentication.
+    
+    With ``wait`` (seconds, up to 30) the request is held until the status
+    differs from ``since`` (default: the status when the request arrived) or
+    the wait runs out, and then answers with the status either way.
+    """
+    token = get_token_from_header(authorization)
+    
+    if not token:
+        raise HTTPException(status_code=401, detail="Authorization token required")
+    
+    if not 0 <= wait <= ORDER_STATUS_MAX_WAIT_SECONDS:
+        raise HTTPException(status_code=400, detail=f"wait must be between 0 and {ORDER_STATUS_MAX_WAIT_SECONDS}")
+    
+    order = await find_order_status(order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    known_status = since or order["status"]
+    deadline = time.monotonic() + wait
+    while order["status"] == known_status:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # Woken at once by the reconciler in this worker; re-read periodically
+        # to pick up changes written by the reconciler in another worker
+        await order_watchers.wait(order_id, min(remaining, ORDER_STATUS_RECHECK_SECONDS))
+        order = await find_order_status(order_id) or order
+    return order
+
+
+# Receipts
+receipt_renderer = ReceiptRenderer(
+    build_executor(), BrandingConfig().restaurant_name,
+    cache_size=RECEIPT_CACHE_SIZE, spool_dir=RECEIPT_SPOOL_DIR,
+)
+
+@api_router.get("/orders/{order_id}/receipt")
+async def get_order_receipt(order_id: str, format: str = "text", authorization: Optional[str] = Header(None)):
+    """Receipt for a placed order - requires authentication.
+    
+    ``format=text`` (default) returns plain text; ``format=escpos`` returns the
+    ESC/POS byte stream for a thermal printer.
+    """
+    token = get_token_from_header(authorization)
+    
+    if not token:
+        raise HTTPException(status_code=401, detail="Authorization token required")
+    
+    if format not in RECEIPT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(RECEIPT_FORMATS)}")
+    
+    data = receipt_renderer.cached(order_id, format)
+    if data is None:
+        order = await db.orders.find_one({"id": order_id}, {"_id": 0, "pos_sync_result": 0})
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        with span("render"):
+            data = await receipt_renderer.render(order, format)
+    
+    if format == "escpos":
+        return Response(data, media_type="application/octet-stream",
+                        headers={"Content-Disposition": f'attachment; filename="receipt-{order_id}.bin"'})
+    return Response(data, media_type="text/plain; charset=utf-8")
+
+
 @api_router.get("/config/branding", response_model=BrandingConfig)
 async def get_branding():
     # In production, this would come from database or external API
     return BrandingConfig()
 
 
+# Kiosk bootstrap: branding, categories, items and tables in one response.
+# Bodies for the full and slim projections are kept per section versions so
+# repeat bootstraps from other kiosks are served without re-serializing or
+# re-compressing; other projections are built per request.
+BOOTSTRAP_GZIP_MIN_BYTES = 1024
+BOOTSTRAP_MEMO_PROJECTIONS = (None, MENU_ITEM_SLIM_FIELDS)
+bootstrap_bodies = {}
+
+def content_version(data) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def bootstrap_section(result, build, error: str) -> dict:
+    """``{"version", "data"}`` from a gathered result, or ``{"version": None, "data": None, "error"}``"""
+    if isinstance(result, PosOverloaded):
+        return {"version": None, "data": None, "error": result.detail}
+    if isinstance(result, BaseException):
+        logger.error(f"Bootstrap section failed: {result!r}")
+        return {"version": None, "data": None, "error": error}
+    if not result:
+        return {"version": None, "data": None, "error": error}
+    return build(result)
+
+
+@api_router.get("/kiosk/bootstrap")
+async def kiosk_bootstrap(request: Request, fields: Optional[str] = None,
+                          authorization: Optional[str] = Header(None)):
+    """Everything the kiosk loads at start-up in a single round trip - requires authentication.
+    
+    Branding, menu and tables are fetched concurrently. Each section is
+    ``{"version", "data"}``; a section that could not be loaded has
+    ``"data": null`` and an ``error`` instead of failing the whole response,
+    except that a token the POS rejects gets 401 so the kiosk can log in again.
+    ``fields`` projects the items as on GET /api/menu/items. The body is gzipped
+    when the client accepts it, and ``ETag`` lets a kiosk revalidate cheaply.
+    """
+    token = get_token_from_header(authorization)
+    
+    if not token:
+        raise HTTPException(status_code=401, detail="Authorization token required")
+    
+    projection = parse_menu_fields(fields)
+    
+    branding, snapshot, registry = await asyncio.gather(
+        get_branding(),
+        fetch_menu_snapshot(token),
+        fetch_table_registry(token),
+        return_exceptions=True,
+    )
+    
+    for result in (snapshot, registry):
+        if isinstance(result, PosTokenRejected):
+            raise result
+    
+    if not isinstance(branding, BaseException):
+        branding = branding.model_dump()
+    
+    sections = {"branding": bootstrap_section(
+        branding, lambda data: {"version": content_version(data), "data": data},
+        "Unable to load branding")}
+    key = (projection, sections["branding"]["version"],
+           getattr(snapshot, "version", None), getattr(registry, "version", None))
+    cached = bootstrap_bodies.get(projection)
+    
+    if cached and cached[0] == key:
+        etag, body, gzipped = cached[1:]
+    else:
+        def menu_items(snapshot):
+            if projection is None:
+                return snapshot.items
+            if projection == MENU_ITEM_SLIM_FIELDS:
+                return snapshot.slim_items
+            return [{field: item[field] for field in projection if field in item} for item in snapshot.items]
+        
+        sections["categories"] = bootstrap_section(
+            snapshot, lambda s: {"version": s.version, "data": s.categories}, "Unable to fetch menu from POS")
+        sections["items"] = bootstrap_section(
+            snapshot, lambda s: {"version": s.version, "data": menu_items(s)}, "Unable to fetch menu from POS")
+        sections["tables"] = bootstrap_section(
+            registry, lambda r: {"version": r.version, "data": r.tables}, "Unable to fetch tables from POS")
+        
+        with span("serialize"):
+            body = JSONResponse(sections).body
+            gzipped = gzip.compress(body, compresslevel=6) if len(body) >= BOOTSTRAP_GZIP_MIN_BYTES else None
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if projection in BOOTSTRAP_MEMO_PROJECTIONS \
+                and all(section.get("error") is None for section in sections.values()):
+            bootstrap_bodies[projection] = (key, etag, body, gzipped)
+    
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    if gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(gzipped, media_type="application/json", headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 # Login Models
 class LoginRequest(BaseModel):
     email: str
@@ -631,39 +1095,128 @@ class LoginResponse(BaseModel):
     firebase_token: Optional[str] = None
     first_login: Optional[str] = None
 
+async def pos_login(email: str, password: str) -> httpx.Response:
+    """Call the POS vendor employee login endpoint"""
+    async with pos_scheduler.slot("login"), track_pos_call("login"):
+        response = await pos_http.post(
+            f"{POS_API_BASE_URL}/auth/vendoremployee/login",
+            json={"email": email, "password": password},
+            headers={"Content-Type": "application/json"},
+            timeout=30.0
+        )
+        if response.status_code != 200:
+            record_pos_error("login", response.status_code)
+        return response
+
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """Proxy login request to POS API"""
     try:
-        async with httpx.AsyncClient() as client_http:
-            response = await client_http.post(
-                f"{POS_API_BASE_URL}/auth/vendoremployee/login",
-                json={"email": request.email, "password": request.password},
-                headers={"Content-Type": "application/json"},
-                timeout=30.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return LoginResponse(
-                    token=data.get("token", ""),
-                    role_name=data.get("role_name"),
-                    role=data.get("role", []),
-                    firebase_token=data.get("firebase_token"),
-                    first_login=data.get("first_login")
-                )
-            elif response.status_code == 401:
-                raise HTTPException(status_code=401, detail="Invalid email or password")
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Login failed")
+        response = await pos_login(request.email, request.password)
     except httpx.RequestError as e:
         logger.error(f"POS API request error: {e}")
         raise HTTPException(status_code=503, detail="Unable to connect to authentication service")
+    
+    if response.status_code == 200:
+        data = response.json()
+        mark_token_verified(data.get("token", ""))
+        return LoginResponse(
+            token=data.get("token", ""),
+            role_name=data.get("role_name"),
+            role=data.get("role", []),
+            firebase_token=data.get("firebase_token"),
+            first_login=data.get("first_login")
+        )
+    elif response.status_code == 401:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    else:
+        raise HTTPException(status_code=response.status_code, detail="Login failed")
+
+
+# Startup pre-warm and readiness
+startup_state = {"ready": False, "warm": False, "startup_seconds": None}
+
+async def login_service_account() -> Optional[str]:
+    """Log in with the configured POS service credential; returns the token or None"""
+    try:
+        response = await pos_login(POS_SERVICE_EMAIL, POS_SERVICE_PASSWORD)
+    except httpx.RequestError as e:
+        logger.error(f"Service account login failed: {e}")
+        return None
+    if response.status_code != 200:
+        logger.error(f"Service account login failed: Status {response.status_code}")
+        return None
+    token = response.json().get("token")
+    if token:
+        mark_token_verified(token)
+        pos_tokens["service"] = token
+    return token
+
+
+async def prewarm_caches() -> bool:
+    """Load the outlet's menu and tables and build their snapshots; True when both are hot"""
+    token = await login_service_account()
+    if not token:
+        return False
+    snapshot, registry = await asyncio.gather(fetch_menu_snapshot(token), fetch_table_registry(token))
+    if snapshot:
+        logger.info(f"Pre-warmed menu: {len(snapshot.items)} items, {len(snapshot.categories)} categories")
+    if registry:
+        logger.info(f"Pre-warmed tables: {len(registry.tables)} tables")
+    return bool(snapshot and registry)
+
+
+async def run_startup_warmup():
+    """Pre-warm caches (retrying with backoff) and then mark the worker ready.
+
+    Gives up after PREWARM_TIMEOUT_SECONDS and serves traffic cold rather than
+    keeping the worker out of rotation while the POS is unavailable.
+    """
+    warm = False
+    if POS_SERVICE_EMAIL and POS_SERVICE_PASSWORD:
+        deadline = PROCESS_START + PREWARM_TIMEOUT_SECONDS
+        delay = 1.0
+        while True:
+            try:
+                warm = await prewarm_caches()
+            except Exception as e:
+                logger.error(f"Pre-warm failed: {e}")
+            remaining = deadline - time.monotonic()
+            if warm or remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 10.0)
+        if not warm:
+            logger.warning(f"Pre-warm did not complete within {PREWARM_TIMEOUT_SECONDS:.0f}s, serving with cold caches")
+    else:
+        logger.info("No POS service credential configured, skipping cache pre-warm")
+    
+    startup_state["warm"] = warm
+    startup_state["startup_seconds"] = round(time.monotonic() - PROCESS_START, 3)
+    startup_state["ready"] = True
+    STARTUP_SECONDS.set(startup_state["startup_seconds"])
+    READY.set(1)
+    logger.info(f"Ready after {startup_state['startup_seconds']}s (caches {'warm' if warm else 'cold'})")
+
+
+@api_router.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+
+@api_router.get("/health/ready")
+async def health_ready():
+    if not startup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "warm": startup_state["warm"], "startup_seconds": startup_state["startup_seconds"]}
 
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint (outside /api so it is not exposed through the kiosk ingress)
+app.add_route(METRICS_PATH, metrics_endpoint, methods=["GET"], include_in_schema=False)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -672,6 +1225,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(PrometheusMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+
+@app.on_event("startup")
+async def start_warmup():
+    # Runs in the background so /api/health/live answers while caches load
+    startup_state["task"] = asyncio.create_task(run_startup_warmup())
+    startup_state["loop_monitor"] = asyncio.create_task(monitor_loop_lag())
+    if ORDER_STATUS_POLL_SECONDS > 0:
+        try:
+            await db.orders.create_index([("status", 1), ("created_at", 1)])
+            await db.orders.create_index("id")
+        except Exception as e:
+            logger.warning(f"Failed to create order indexes: {e}")
+        startup_state["reconciler"] = asyncio.create_task(order_reconciler.run())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task_name in ("reconciler", "loop_monitor"):
+        if task_name in startup_state:
+            startup_state[task_name].cancel()
+    receipt_renderer.shutdown()
+    menu_pool.shutdown(wait=False, cancel_futures=True)
     client.close()
+    await pos_http.aclose()
+    mark_worker_exited()
@@ -0,0 +1,266 @@
+"""Caches for POS data (menu, table config).
+
+Two interchangeable backends expose the same ``get(key, loader)`` and
+``put(key, data)`` calls:
+
+LocalCache
+    Per-process dict, the original behaviour. Fine for a single uvicorn worker.
+
+MongoSnapshotCache
+    Snapshots live in ``db.cache_snapshots`` and are shared by every worker.
+    Each worker keeps the snapshot it last saw as a local L1 and only re-checks
+    the shared version every ``l1_ttl`` seconds (a tiny projected read). When
+    the shared snapshot expires, one worker wins a lease in ``db.cache_leases``
+    and refreshes it from the POS; the others keep serving the snapshot they
+    have (or wait briefly for the winner when they have none), so all workers
+    converge on the same version and the POS sees one fetch per TTL instead of
+    one per worker.
+
+Both backends collapse concurrent misses for the same key inside a worker into
+a single loader call.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from metrics import record_cache_event
+
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+Loader = Callable[[], Awaitable[Optional[Any]]]
+
+
+class CacheEntry:
+    """One cached value plus its version.
+
+    ``derived`` holds per-worker structures computed from ``data`` (lookup maps,
+    transformed views); it is discarded together with the entry when a new
+    version arrives, so derived data never outlives the snapshot it came from.
+    """
+
+    __slots__ = ("data", "version", "expires", "checked_at", "derived")
+
+    def __init__(self, data: Any, version: int, expires: datetime):
+        self.data = data
+        self.version = version
+        self.expires = expires
+        self.checked_at = time.monotonic()
+        self.derived = {}
+
+
+class LocalCache:
+    def __init__(self, name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._entries = {}
+        self._locks = {}
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Entry for ``key`` as this worker last saw it, fresh or stale, without loading"""
+        return self._entries.get(key)
+
+    async def put(self, key: str, data: Any) -> CacheEntry:
+        """Store freshly fetched data as the new version for ``key``"""
+        old_entry = self._entries.get(key)
+        if old_entry is not None:
+            record_cache_event(self.name, "eviction")
+        entry = CacheEntry(data, int(time.time() * 1000), datetime.now(timezone.utc) + self.ttl)
+        self._entries[key] = entry
+        return entry
+
+    async def get(self, key: str, loader: Loader, force_refresh: bool = False) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if not force_refresh and entry and entry.expires > datetime.now(timezone.utc):
+            record_cache_event(self.name, "hit")
+            return entry
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed while we waited for the lock
+            current = self._entries.get(key)
+            if current is not entry and current and current.expires > datetime.now(timezone.utc):
+                record_cache_event(self.name, "hit")
+                return current
+            record_cache_event(self.name, "miss")
+
+            data = await loader()
+            if data is None:
+                return None
+            return await LocalCache.put(self, key, data)
+
+
+class MongoSnapshotCache(LocalCache):
+    def __init__(self, name: str, ttl_seconds: float, get_db: Callable[[], Any],
+                 l1_ttl_seconds: float = 5.0, lease_seconds: float = 30.0, wait_seconds: float = 10.0):
+        super().__init__(name, ttl_seconds)
+        self.get_db = get_db
+        self.l1_ttl = l1_ttl_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.wait_seconds = wait_seconds
+
+    def _doc_id(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def put(self, key: str, data: Any) -> CacheEntry:
+        entry = await super().put(key, data)
+        try:
+            await self._write_snapshot(self._doc_id(key), entry)
+        except PyMongoError as e:
+            logger.error(f"Shared cache '{self.name}' unavailable, kept update local: {e}")
+        return entry
+
+    async def _write_snapshot(self, doc_id: str, entry: CacheEntry) -> None:
+        await self.get_db().cache_snapshots.update_one(
+            {"_id": doc_id},
+            {"$set": {"data": entry.data, "version": entry.version, "expires": entry.expires,
+                      "refreshed_at": datetime.now(timezone.utc), "refreshed_by": WORKER_ID}},
+            upsert=True,
+        )
+
+    async def get(self, key: str, loader: Loader, force_refresh: bool = False) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if not force_refresh and entry and time.monotonic() - entry.checked_at < self.l1_ttl \
+                and entry.expires > datetime.now(timezone.utc):
+            record_cache_event(self.name, "hit")
+            return entry
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if not force_refresh and entry and time.monotonic() - entry.checked_at < self.l1_ttl \
+                    and entry.expires > datetime.now(timezone.utc):
+                record_cache_event(self.name, "hit")
+                return entry
+            try:
+                return await self._get_shared(key, loader, entry, force_refresh)
+            except PyMongoError as e:
+                # Shared tier unavailable: degrade to per-worker caching rather than failing requests
+                logger.error(f"Shared cache '{self.name}' unavailable, falling back to local: {e}")
+                if entry and not force_refresh and entry.expires > datetime.now(timezone.utc):
+                    return entry
+                return await self._load_local(key, loader, entry)
+
+    async def _get_shared(self, key: str, loader: Loader, entry: Optional[CacheEntry],
+                          force_refresh: bool) -> Optional[CacheEntry]:
+        snapshots = self.get_db().cache_snapshots
+        doc_id = self._doc_id(key)
+        now = datetime.now(timezone.utc)
+
+        if not force_refresh:
+            meta = await snapshots.find_one({"_id": doc_id}, {"version": 1, "expires": 1})
+            if meta and _aware(meta["expires"]) > now:
+                if entry and entry.version == meta["version"]:
+                    # Same snapshot as our L1: just note that we re-validated it
+                    record_cache_event(self.name, "hit")
+                    entry.checked_at = time.monotonic()
+                    return entry
+                return await self._adopt(key, doc_id, entry)
+
+        record_cache_event(self.name, "miss")
+        if await self._acquire_lease(doc_id):
+            try:
+                data = await loader()
+                if data is None:
+                    return None
+                new_entry = CacheEntry(data, int(time.time() * 1000), now + self.ttl)
+                await self._write_snapshot(doc_id, new_entry)
+                return self._store(key, new_entry, entry)
+            finally:
+                await self._release_lease(doc_id)
+
+        # Another worker is refreshing: serve what we have, or wait for its snapshot
+        if entry is not None:
+            entry.checked_at = time.monotonic()
+            return entry
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            meta = await snapshots.find_one({"_id": doc_id}, {"version": 1, "expires": 1})
+            if meta and _aware(meta["expires"]) > datetime.now(timezone.utc):
+                return await self._adopt(key, doc_id, entry)
+        # Refresher stalled; fetch ourselves rather than failing the request
+        return await self._load_local(key, loader, entry)
+
+    async def _adopt(self, key: str, doc_id: str, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        doc = await self.get_db().cache_snapshots.find_one({"_id": doc_id})
+        if not doc:
+            return entry
+        return self._store(key, CacheEntry(doc["data"], doc["version"], _aware(doc["expires"])), entry)
+
+    def _store(self, key: str, new_entry: CacheEntry, old_entry: Optional[CacheEntry]) -> CacheEntry:
+        if old_entry is not None:
+            record_cache_event(self.name, "eviction")
+        self._entries[key] = new_entry
+        return new_entry
+
+    async def _load_local(self, key: str, loader: Loader, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        data = await loader()
+        if data is None:
+            return None
+        return self._store(key, CacheEntry(data, int(time.time() * 1000), datetime.now(timezone.utc) + self.ttl), entry)
+
+    async def _acquire_lease(self, doc_id: str) -> bool:
+        return await acquire_lease(self.get_db().cache_leases, doc_id, self.lease)
+
+    async def _release_lease(self, doc_id: str) -> None:
+        try:
+            await release_lease(self.get_db().cache_leases, doc_id)
+        except PyMongoError as e:
+            logger.warning(f"Failed to release cache lease {doc_id}: {e}")
+
+
+async def acquire_lease(leases, lease_id: str, duration: timedelta) -> bool:
+    """Take (or extend, if this worker already holds it) the lease ``lease_id``.
+
+    Returns False while another worker holds an unexpired lease. Leases are
+    documents in ``leases`` (a Mongo collection) keyed by ``_id``.
+    """
+    now = datetime.now(timezone.utc)
+    renewed = await leases.update_one(
+        {"_id": lease_id, "owner": WORKER_ID},
+        {"$set": {"lease_until": now + duration}},
+    )
+    if renewed.matched_count:
+        return True
+    try:
+        await leases.update_one(
+            {"_id": lease_id, "lease_until": {"$lt": now}},
+            {"$set": {"owner": WORKER_ID, "lease_until": now + duration}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        # Lease document exists and is still held by another worker
+        return False
+
+
+async def release_lease(leases, lease_id: str) -> None:
+    await leases.update_one(
+        {"_id": lease_id, "owner": WORKER_ID},
+        {"$set": {"lease_until": datetime.fromtimestamp(0, timezone.utc)}},
+    )
+
+
+def _aware(value: datetime) -> datetime:
+    # pymongo returns naive UTC datetimes unless the client is tz_aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def build_cache(name: str, ttl_seconds: float, get_db: Callable[[], Any]) -> LocalCache:
+    """Create the cache backend selected by CACHE_BACKEND ("local" or "mongo")"""
+    backend = os.environ.get('CACHE_BACKEND', 'local').lower()
+    if backend == "mongo":
+        return MongoSnapshotCache(
+            name, ttl_seconds, get_db,
+            l1_ttl_seconds=float(os.environ.get('CACHE_L1_TTL_SECONDS', '5')),
+        )
+    return LocalCache(name, ttl_seconds)
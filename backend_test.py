@@ -111,6 +111,30 @@ class KioskAPITester:
         )
         return success
 
+    def test_liveness(self):
+        """Test liveness probe"""
+        success, response = self.run_test(
+            "Liveness Probe",
+            "GET",
+            "api/health/live",
+            200
+        )
+        return success
+
+    def test_readiness(self):
+        """Test readiness probe (200 once startup pre-warm has finished)"""
+        success, response = self.run_test(
+            "Readiness Probe",
+            "GET",
+            "api/health/ready",
+            200
+        )
+        
+        if success and isinstance(response, dict):
+            print(f"   Caches warm: {response.get('warm')}, startup took {response.get('startup_seconds')}s")
+        
+        return success
+
     def test_login(self, email="test@example.com", password="testpassword"):
         """Test login endpoint (expected to fail without valid credentials)"""
         success, response = self.run_test(
@@ -196,6 +220,28 @@ class KioskAPITester:
         
         return success
 
+    def test_bootstrap(self):
+        """Test kiosk bootstrap endpoint (all sections in one response)"""
+        success, response = self.run_test(
+            "Kiosk Bootstrap",
+            "GET",
+            "api/kiosk/bootstrap",
+            200
+        )
+        
+        if success and isinstance(response, dict):
+            for name in ("branding", "categories", "items", "tables"):
+                section = response.get(name) or {}
+                if section.get("error"):
+                    print(f"   ⚠️  {name}: {section['error']}")
+                    success = False
+                else:
+                    data = section.get("data")
+                    count = len(data) if isinstance(data, list) else 1
+                    print(f"   ✅ {name}: {count} (version {section.get('version')})")
+        
+        return success
+
     def run_all_tests(self):
         """Run all API tests"""
         print("🚀 Starting Kiosk API Tests")
@@ -204,6 +250,8 @@ class KioskAPITester:
 
         # Test health check
         health_ok = self.test_health_check()
+        self.test_liveness()
+        ready_ok = self.test_readiness()
         
         # Test authentication (expected to fail)
         login_tested = self.test_login()
@@ -217,6 +265,9 @@ class KioskAPITester:
         
         # Test branding config
         branding_ok = self.test_branding_config()
+        
+        # Test single-request bootstrap
+        bootstrap_ok = self.test_bootstrap()
 
         print("\n" + "=" * 60)
         print(f"📊 Test Results: {self.tests_passed}/{self.tests_run} passed")
@@ -231,12 +282,16 @@ class KioskAPITester:
         critical_failures = []
         if not health_ok:
             critical_failures.append("API Health Check failed")
+        if not ready_ok:
+            critical_failures.append("Readiness probe failed")
         if not categories_ok:
             critical_failures.append("Menu Categories endpoint failed")
         if not items_ok:
             critical_failures.append("Menu Items endpoint failed")
         if not tables_ok:
             critical_failures.append("Tables endpoint failed")
+        if not bootstrap_ok:
+            critical_failures.append("Kiosk bootstrap endpoint failed")
             
         if critical_failures:
             print(f"\n🚨 Critical Issues Found:")
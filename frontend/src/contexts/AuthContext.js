@@ -66,6 +66,32 @@ export const AuthProvider = ({ children }) => {
     }));
   };
 
+  // Fetch everything the kiosk needs in a single request. Branding is optional
+  // (defaults are used when it fails); menu and tables are required. Items are
+  // fetched in full (no fields=slim): the item modal reads variation_groups,
+  // allergens etc. from this cached menu, which must also work offline.
+  const fetchBootstrap = async (token) => {
+    const res = await axios.get(`${API_URL}/api/kiosk/bootstrap`, {
+      headers: { Authorization: `Bearer ${token}` }
+    });
+    const { branding, categories, items, tables } = res.data;
+    if (branding.error) {
+      console.warn('Failed to fetch branding, using defaults');
+    }
+    const failed = [categories, items, tables].find(section => section.error);
+    if (failed) {
+      throw new Error(failed.error);
+    }
+    return {
+      branding: branding.data,
+      menuData: {
+        categories: categories.data,
+        menuItems: items.data,
+        tables: tables.data || []
+      }
+    };
+  };
+
   const login = async (email, password) => {
     try {
       setLoginProgress({ isLoggingIn: true, currentStep: 'Authenticating...', steps: [] });
@@ -87,43 +113,13 @@ export const AuthProvider = ({ children }) => {
         loginTime: new Date().toISOString()
       };
 
-      const authAxios = axios.create({
-        headers: { Authorization: `Bearer ${data.token}` }
-      });
-
-      // Step 2: Fetch branding
-      updateProgress('Loading Theme', 'loading');
-      let fetchedBranding = null;
-      try {
-        const brandingRes = await axios.get(`${API_URL}/api/config/branding`);
-        fetchedBranding = brandingRes.data;
-      } catch (e) {
-        console.warn('Failed to fetch branding, using defaults');
-      }
-      updateProgress('Loading Theme', 'done');
-
-      // Step 3: Fetch categories
-      updateProgress('Loading Categories', 'loading');
-      const catRes = await authAxios.get(`${API_URL}/api/menu/categories`);
-      updateProgress('Loading Categories', 'done');
+      // Step 2: Fetch branding, categories, menu items and tables in one round trip
+      const bootstrapSteps = ['Loading Theme', 'Loading Categories', 'Loading Menu Items', 'Loading Tables'];
+      bootstrapSteps.forEach(step => updateProgress(step, 'loading'));
+      const { menuData: fetchedMenuData, branding: fetchedBranding } = await fetchBootstrap(data.token);
+      bootstrapSteps.forEach(step => updateProgress(step, 'done'));
 
-      // Step 4: Fetch menu items
-      updateProgress('Loading Menu Items', 'loading');
-      const itemsRes = await authAxios.get(`${API_URL}/api/menu/items`);
-      updateProgress('Loading Menu Items', 'done');
-
-      // Step 5: Fetch tables
-      updateProgress('Loading Tables', 'loading');
-      const tablesRes = await authAxios.get(`${API_URL}/api/tables`);
-      updateProgress('Loading Tables', 'done');
-
-      const fetchedMenuData = {
-        categories: catRes.data,
-        menuItems: itemsRes.data,
-        tables: tablesRes.data.tables || []
-      };
-
-      // Step 6: Store everything
+      // Step 3: Store everything
       updateProgress('Finalizing', 'loading');
       setUser(userData);
       setMenuData(fetchedMenuData);
@@ -167,21 +163,16 @@ export const AuthProvider = ({ children }) => {
   // Function to refresh menu data (manual refresh if needed)
   const refreshMenuData = async () => {
     if (!user?.token) return;
-    const authAxios = axios.create({
-      headers: { Authorization: `Bearer ${user.token}` }
-    });
-    
-    const [catRes, itemsRes, tablesRes] = await Promise.all([
-      authAxios.get(`${API_URL}/api/menu/categories`),
-      authAxios.get(`${API_URL}/api/menu/items`),
-      authAxios.get(`${API_URL}/api/tables`)
-    ]);
-    
-    const fetchedMenuData = {
-      categories: catRes.data,
-      menuItems: itemsRes.data,
-      tables: tablesRes.data.tables || []
-    };
+    let fetchedMenuData;
+    try {
+      ({ menuData: fetchedMenuData } = await fetchBootstrap(user.token));
+    } catch (error) {
+      if (error.response?.status === 401) {
+        // POS session expired: back to the login screen
+        logout();
+      }
+      throw error;
+    }
     
     setMenuData(fetchedMenuData);
     localStorage.setItem('kiosk_menu_data', JSON.stringify(fetchedMenuData));
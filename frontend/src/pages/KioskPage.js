@@ -7,6 +7,7 @@ import { useAuth } from '@/contexts/AuthContext';
 import { toast } from 'sonner';
 import touchSound from '@/utils/touchSound';
 import kioskLock from '@/utils/kioskLock';
+import getKioskId from '@/utils/kioskId';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -23,6 +24,7 @@ const createAuthAxios = (token) => {
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    config.headers['X-Kiosk-Id'] = getKioskId();
     return config;
   });
   return instance;
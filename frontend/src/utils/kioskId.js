@@ -0,0 +1,22 @@
+// Stable per-device kiosk id, sent as X-Kiosk-Id so the backend can rate-limit
+// each kiosk separately even when several share one login or network address
+
+const STORAGE_KEY = 'kiosk_device_id';
+
+const generateId = () => {
+  if (window.crypto && window.crypto.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+};
+
+const getKioskId = () => {
+  let kioskId = localStorage.getItem(STORAGE_KEY);
+  if (!kioskId) {
+    kioskId = generateId();
+    localStorage.setItem(STORAGE_KEY, kioskId);
+  }
+  return kioskId;
+};
+
+export default getKioskId;
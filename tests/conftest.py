@@ -0,0 +1,39 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend runs from backend/ with its modules imported flat (see server.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# server reads its configuration at import time; unit tests never connect to Mongo
+os.environ.setdefault("MONGO_URL", "mongodb://127.0.0.1:1")
+os.environ.setdefault("DB_NAME", "kiosk_test")
+
+
+@pytest.fixture
+def pos(monkeypatch):
+    """Answer the server's POS calls without a network.
+
+    ``pos.responses`` maps a path suffix to ``(status, json)``; other calls get
+    ``pos.status``. Outlet caches start empty.
+    """
+    import httpx
+    import server
+    from shared_cache import LocalCache
+
+    class MockPos:
+        status = 200
+        responses = {}
+
+    def handler(request):
+        for suffix, (status, body) in MockPos.responses.items():
+            if request.url.path.endswith(suffix):
+                return httpx.Response(status, json=body)
+        return httpx.Response(MockPos.status, json={"message": "POS says no"})
+
+    monkeypatch.setattr(server, "pos_http", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(server, "menu_cache", LocalCache("menu", 300))
+    monkeypatch.setattr(server, "tables_cache", LocalCache("tables", 300))
+    return MockPos
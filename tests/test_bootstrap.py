@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+
+import server
+
+
+def bootstrap(token):
+    return TestClient(server.app).get("/api/kiosk/bootstrap", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_token_rejected_by_pos_gets_401(pos):
+    pos.status = 401
+    response = bootstrap("bootstrap-expired-token")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Session expired. Please log in again."
+    assert not server.is_token_verified("bootstrap-expired-token")
+
+
+def test_pos_failure_is_reported_per_section(pos):
+    pos.status = 500
+    response = bootstrap("bootstrap-pos-down-token")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["branding"]["data"] is not None
+    assert body["items"] == {"version": None, "data": None, "error": "Unable to fetch menu from POS"}
+    assert body["tables"]["error"] == "Unable to fetch tables from POS"
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import server
+from bench.mock_pos import load_foods
+from menu_transform import MENU_ITEM_SLIM_FIELDS
+
+
+def test_menu_cursor_round_trip():
+    cursor = server.encode_menu_cursor("v1", 40)
+    assert server.decode_menu_cursor(cursor, "v1") == 40
+
+
+def test_menu_cursor_rejects_garbage_and_stale_versions():
+    with pytest.raises(HTTPException) as invalid:
+        server.decode_menu_cursor("not-a-cursor!", "v1")
+    assert invalid.value.status_code == 400
+    with pytest.raises(HTTPException) as stale:
+        server.decode_menu_cursor(server.encode_menu_cursor("v1", 40), "v2")
+    assert stale.value.status_code == 409
+
+
+def test_parse_menu_fields():
+    assert server.parse_menu_fields(None) is None
+    assert server.parse_menu_fields("") is None
+    assert server.parse_menu_fields("slim") == MENU_ITEM_SLIM_FIELDS
+    with pytest.raises(HTTPException) as unknown:
+        server.parse_menu_fields("id,secret")
+    assert unknown.value.status_code == 400
+
+
+def test_parse_menu_fields_rejects_empty_field_list():
+    for fields in (",", " , ,", "  "):
+        with pytest.raises(HTTPException) as empty:
+            server.parse_menu_fields(fields)
+        assert empty.value.status_code == 400
+
+
+def test_menu_items_rejects_cursor_without_limit():
+    client = TestClient(server.app)
+    cursor = server.encode_menu_cursor("v1", 40)
+    response = client.get("/api/menu/items", params={"cursor": cursor},
+                          headers={"Authorization": "Bearer unit-test-token"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "cursor requires limit"
+
+
+def test_parse_menu_fields_is_order_independent():
+    assert server.parse_menu_fields("price, id,name,id") == ("id", "name", "price")
+    assert server.parse_menu_fields(",".join(reversed(MENU_ITEM_SLIM_FIELDS))) == MENU_ITEM_SLIM_FIELDS
+
+
+@pytest.fixture
+def menu_pool(monkeypatch):
+    pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+    monkeypatch.setattr(server, "menu_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+def build_snapshot(foods, threshold, chunk_size, monkeypatch):
+    monkeypatch.setattr(server, "MENU_POOL_THRESHOLD", threshold)
+    monkeypatch.setattr(server, "MENU_POOL_CHUNK_SIZE", chunk_size)
+    return asyncio.run(server.build_menu_snapshot(foods))
+
+
+def test_pooled_menu_build_matches_inline_build(menu_pool, monkeypatch):
+    foods = load_foods(120)
+    inline = build_snapshot(foods, len(foods) + 1, 250, monkeypatch)
+    # Uneven chunks, so categories and items are merged across chunk boundaries
+    pooled = build_snapshot(foods, 0, 7, monkeypatch)
+
+    assert pooled.items_body == inline.items_body
+    assert pooled.slim_items_body == inline.slim_items_body
+    assert pooled.categories_body == inline.categories_body
+    assert pooled.version == inline.version
+    assert pooled.items == inline.items
+    assert json.loads(pooled.items_body) == pooled.items
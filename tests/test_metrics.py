@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+def test_scrapes_are_labelled_with_the_metrics_route():
+    client = TestClient(server.app)
+    client.get("/no-such-page")
+    client.get("/metrics")
+    body = client.get("/metrics").text
+    assert 'kiosk_http_requests_total{method="GET",route="/metrics",status="200"}' in body
+    assert 'kiosk_http_requests_total{method="GET",route="<unmatched>",status="404"}' in body
+
+
+def run_worker(script: str, multiproc_dir: Path) -> str:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)}
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def test_metrics_are_aggregated_across_worker_processes(tmp_path):
+    record = "from metrics import ORDERS_TOTAL; ORDERS_TOTAL.labels('confirmed').inc()"
+    run_worker(record, tmp_path)
+    run_worker(record, tmp_path)
+    scrape = (
+        "import asyncio; from metrics import metrics_endpoint; "
+        "print(asyncio.run(metrics_endpoint(None)).body.decode())"
+    )
+    body = run_worker(scrape, tmp_path)
+    assert 'kiosk_orders_total{outcome="confirmed"} 2.0' in body
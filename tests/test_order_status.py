@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from prometheus_client import REGISTRY
+from pymongo.errors import PyMongoError
+
+from bench.memory_db import MemoryDatabase
+from order_status import OrderStatusReconciler, StatusWatchers, map_pos_status, parse_pos_order_statuses
+
+
+def test_parse_pos_order_statuses_shapes():
+    orders = [{"id": 11, "order_status": "cooking"}, {"order_id": "12", "status": "done"},
+              {"id": 13}, "junk"]
+    expected = {"11": "cooking", "12": "done"}
+    assert parse_pos_order_statuses(orders) == expected
+    assert parse_pos_order_statuses({"orders": orders}) == expected
+    assert parse_pos_order_statuses({"data": orders}) == expected
+    assert parse_pos_order_statuses({"data": {"orders": orders}}) == expected
+    assert parse_pos_order_statuses({"data": None}) == {}
+
+
+def test_map_pos_status():
+    assert map_pos_status(" Cooking ") == "preparing"
+    assert map_pos_status("served") == "completed"
+    assert map_pos_status("teleported") is None
+    assert map_pos_status(None) is None
+
+
+def make_order(order_id, pos_order_id, status="confirmed", age_hours=0):
+    created_at = datetime.now(timezone.utc) - timedelta(hours=age_hours)
+    return {"id": order_id, "pos_order_id": pos_order_id, "status": status,
+            "created_at": created_at.isoformat()}
+
+
+def changes_counted(status):
+    return REGISTRY.get_sample_value("kiosk_order_status_changes_total", {"status": status}) or 0
+
+
+def run_reconcile(orders, pos_statuses, db=None):
+    db = db or MemoryDatabase()
+    watchers = StatusWatchers()
+
+    async def fetch_statuses():
+        return pos_statuses
+
+    async def run():
+        for order in orders:
+            await db.orders.insert_one(order)
+        reconciler = OrderStatusReconciler(lambda: db, fetch_statuses, watchers, max_age_hours=12)
+        waiter = asyncio.create_task(watchers.wait("a", timeout=1))
+        await asyncio.sleep(0)
+        changed = await reconciler.reconcile_once()
+        woken = await waiter
+        stored = {doc["id"]: doc for doc in await db.orders.find({}, {"_id": 0}).to_list(None)}
+        return changed, woken, stored
+
+    return asyncio.run(run())
+
+
+def test_reconcile_once_applies_changes_and_wakes_waiters():
+    orders = [
+        make_order("a", "101"),
+        make_order("b", "102", status="preparing"),
+        make_order("c", "103"),
+        make_order("d", "104", age_hours=24),
+    ]
+    changed, woken, stored = run_reconcile(orders, {"101": "cooking", "102": "mystery", "104": "served"})
+
+    assert changed == 1
+    assert woken is True
+    assert stored["a"]["status"] == "preparing"
+    assert stored["a"]["pos_status"] == "cooking"
+    # Unknown status, missing from the POS response, or too old: left as is
+    assert stored["b"]["status"] == "preparing"
+    assert stored["c"]["status"] == "confirmed"
+    assert stored["d"]["status"] == "confirmed"
+
+
+def test_reconcile_once_leaves_orders_when_pos_call_fails():
+    changed, woken, stored = run_reconcile([make_order("a", "101")], None)
+    assert changed == 0
+    assert woken is False
+    assert stored["a"]["status"] == "confirmed"
+
+
+def test_failed_write_counts_no_changes_and_wakes_no_one():
+    db = MemoryDatabase()
+
+    async def bulk_write(requests, ordered=True):
+        raise PyMongoError("primary stepped down")
+
+    db.orders.bulk_write = bulk_write
+    before = changes_counted("ready")
+    changed, woken, stored = run_reconcile([make_order("a", "101")], {"101": "done"}, db)
+    assert changed == 0
+    assert woken is False
+    assert changes_counted("ready") == before
+
+
+def test_successful_write_counts_changes():
+    before = changes_counted("completed")
+    run_reconcile([make_order("a", "101"), make_order("b", "102")], {"101": "served", "102": "paid"})
+    assert changes_counted("completed") == before + 2
@@ -0,0 +1,16 @@
+import server
+
+
+def test_kiosk_id_is_scoped_to_the_session():
+    assert server.get_kiosk_id("token-a", "kiosk-1") != server.get_kiosk_id("token-b", "kiosk-1")
+    assert server.get_kiosk_id("token-a", "kiosk-1") != server.get_kiosk_id("token-a", "kiosk-2")
+    assert server.get_kiosk_id("token-a", " kiosk-1 ") == server.get_kiosk_id("token-a", "kiosk-1")
+
+
+def test_kiosk_id_without_header_falls_back_to_the_session():
+    assert server.get_kiosk_id("token-a", None) == server.get_kiosk_id("token-a", "")
+    assert server.get_kiosk_id("token-a", None) != server.get_kiosk_id("token-b", None)
+
+
+def test_kiosk_id_is_bounded():
+    assert len(server.get_kiosk_id("token-a", "x" * 1000)) < 100
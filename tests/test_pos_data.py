@@ -0,0 +1,63 @@
+import asyncio
+
+import server
+from shared_cache import LocalCache
+
+
+def run_fetches(responses, tokens):
+    cache = LocalCache("test", ttl_seconds=300)
+    loaded = []
+
+    async def load(token):
+        loaded.append(token)
+        server.mark_token_verified(token)
+        return responses.pop(0)
+
+    async def run():
+        entries = []
+        for token in tokens:
+            entry = await server.fetch_pos_data(cache, load, token)
+            entry.derived.setdefault("registry", f"built from {token}")
+            entries.append(entry)
+        return entries
+
+    return asyncio.run(run()), loaded
+
+
+def test_verified_token_is_served_from_cache():
+    (first, second), loaded = run_fetches([{"tables": [1]}], ["pos-data-token-a", "pos-data-token-a"])
+    assert loaded == ["pos-data-token-a"]
+    assert second is first
+
+
+def test_new_token_keeps_fresh_entry_and_its_derived_data():
+    (first, same), loaded = run_fetches([{"tables": [1, 2]}, {"tables": [1, 2]}],
+                                        ["pos-data-token-b", "pos-data-token-c"])
+    # The unknown token still goes to the POS once
+    assert loaded == ["pos-data-token-b", "pos-data-token-c"]
+    assert same is first
+    assert same.derived == {"registry": "built from pos-data-token-b"}
+
+
+def test_new_token_replaces_entry_when_pos_data_changed():
+    (first, changed), _ = run_fetches([{"tables": [1, 2]}, {"tables": [1, 2, 3]}],
+                                      ["pos-data-token-d", "pos-data-token-e"])
+    assert changed is not first
+    assert changed.data == {"tables": [1, 2, 3]}
+    assert changed.derived == {"registry": "built from pos-data-token-e"}
+
+
+def test_rejected_token_leaves_cache_untouched():
+    cache = LocalCache("test", ttl_seconds=300)
+
+    async def load(token):
+        return None
+
+    async def run():
+        entry = await cache.put(server.POS_CACHE_KEY, {"tables": [1]})
+        return entry, await server.fetch_pos_data(cache, load, "pos-data-token-bad")
+
+    entry, rejected = asyncio.run(run())
+    assert rejected is None
+    assert cache.peek(server.POS_CACHE_KEY) is entry
+    assert not server.is_token_verified("pos-data-token-bad")
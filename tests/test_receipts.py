@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from receipts import RECEIPT_FORMATS, ReceiptRenderer, render_receipt
+
+
+ORDER = {
+    "id": "order-1",
+    "pos_order_id": "900001",
+    "table_number": "T4",
+    "items": [
+        {"name": "Masala Dosa", "price": 120.0, "quantity": 2, "variations": [],
+         "grouped_variations": {"Size": ["Large"]}, "special_instructions": "less spicy"},
+    ],
+    "subtotal": 240.0,
+    "cgst": 6.0,
+    "sgst": 6.0,
+    "total": 252.0,
+    "created_at": "2026-01-01T10:00:00+00:00",
+}
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.fixture
+def executor():
+    executor = CountingExecutor()
+    yield executor
+    executor.shutdown()
+
+
+def render_in_background(renderer, order):
+    async def run():
+        renderer.render_in_background(order)
+        await asyncio.gather(*renderer._background)
+    asyncio.run(run())
+
+
+def test_render_receipt_formats():
+    text = render_receipt(ORDER, "text", "Spice Route").decode()
+    assert "Order #900001" in text
+    assert "Size: Large" in text
+    assert "Note: less spicy" in text
+    assert text.rstrip().endswith("Thank you!")
+
+    escpos = render_receipt(ORDER, "escpos", "Spice Route")
+    assert escpos.startswith(b"\x1b@")
+    assert escpos.endswith(b"\x1bd\x04\x1dV\x01")
+    assert b"TOTAL (Rs.)" in escpos
+
+
+def test_on_demand_render_never_spools(executor, tmp_path):
+    renderer = ReceiptRenderer(executor, "Spice Route", cache_size=1, spool_dir=str(tmp_path))
+
+    async def run():
+        await renderer.render(ORDER, "escpos")
+        # Evicted by another order, then rendered again as a GET after eviction would
+        await renderer.render(dict(ORDER, id="order-2"), "escpos")
+        await renderer.render(ORDER, "escpos")
+
+    asyncio.run(run())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_background_render_spools_escpos_once(executor, tmp_path):
+    renderer = ReceiptRenderer(executor, "Spice Route", spool_dir=str(tmp_path))
+    render_in_background(renderer, ORDER)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["order-1.bin"]
+    assert (tmp_path / "order-1.bin").read_bytes() == renderer.cached("order-1", "escpos")
+    assert executor.calls.count("spool_receipt") == 1
+
+
+def test_background_render_spools_even_when_already_cached(executor, tmp_path):
+    renderer = ReceiptRenderer(executor, "Spice Route", spool_dir=str(tmp_path))
+    asyncio.run(renderer.render(ORDER, "escpos"))
+    render_in_background(renderer, ORDER)
+
+    assert (tmp_path / "order-1.bin").exists()
+    assert executor.calls.count("render_receipt") == len(RECEIPT_FORMATS)
+
+
+def test_renders_are_cached_and_shared(executor):
+    renderer = ReceiptRenderer(executor, "Spice Route", cache_size=2)
+
+    async def run():
+        first = await asyncio.gather(*(renderer.render(ORDER, "text") for _ in range(5)))
+        second = await renderer.render(ORDER, "text")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert executor.calls == ["render_receipt"]
+    assert all(data == second for data in first)
+    assert renderer.cached("order-1", "text") == second
+
+
+def test_cache_evicts_least_recently_used(executor):
+    renderer = ReceiptRenderer(executor, "Spice Route", cache_size=2)
+
+    async def run():
+        await renderer.render(ORDER, "text")
+        await renderer.render(dict(ORDER, id="order-2"), "text")
+        renderer.cached("order-1", "text")
+        await renderer.render(dict(ORDER, id="order-3"), "text")
+
+    asyncio.run(run())
+    assert renderer.cached("order-1", "text") is not None
+    assert renderer.cached("order-2", "text") is None
+    assert renderer.cached("order-3", "text") is not None
@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+import scheduler
+from scheduler import WORK_CLASSES, OrderRateLimiter, PosOverloaded, PosScheduler
+
+
+def make_scheduler(max_concurrency=1, concurrency=1, max_queue=8):
+    return PosScheduler(max_concurrency, {cls: (concurrency, max_queue) for cls in WORK_CLASSES})
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_are_admitted_by_class_priority():
+    async def run():
+        pos = make_scheduler()
+        admitted = []
+        release = asyncio.Event()
+
+        async def hold():
+            async with pos.slot("menu"):
+                await release.wait()
+
+        async def call(work_class):
+            async with pos.slot(work_class):
+                admitted.append(work_class)
+
+        holder = asyncio.create_task(hold())
+        await settle()
+        waiters = [asyncio.create_task(call(cls)) for cls in ("status", "login", "menu", "tables", "orders")]
+        await settle()
+        assert admitted == []
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return admitted, pos
+
+    admitted, pos = asyncio.run(run())
+    assert admitted == ["orders", "tables", "menu", "login", "status"]
+    assert pos.total_running == 0
+
+
+def test_class_waiting_on_its_own_limit_does_not_block_other_classes():
+    async def run():
+        pos = make_scheduler(max_concurrency=16, concurrency=1)
+        admitted = []
+        release = asyncio.Event()
+
+        async def call(work_class, wait=False):
+            async with pos.slot(work_class):
+                admitted.append(work_class)
+                if wait:
+                    await release.wait()
+
+        holder = asyncio.create_task(call("orders", wait=True))
+        await settle()
+        queued = asyncio.create_task(call("orders"))
+        await settle()
+        # Orders are at their class limit, not the global one: menu and login start at once
+        others = [asyncio.create_task(call(cls)) for cls in ("menu", "login")]
+        await asyncio.gather(*others)
+        assert admitted == ["orders", "menu", "login"]
+        release.set()
+        await asyncio.gather(holder, queued)
+        return admitted
+
+    assert asyncio.run(run()) == ["orders", "menu", "login", "orders"]
+
+
+def test_freed_global_slot_goes_to_queued_higher_priority_work():
+    async def run():
+        pos = make_scheduler(max_concurrency=1, concurrency=2)
+        admitted = []
+
+        async def call(work_class):
+            async with pos.slot(work_class):
+                admitted.append(work_class)
+
+        held = pos.slot("menu")
+        await held.__aenter__()
+        # Held back by the global limit only
+        order = asyncio.create_task(call("orders"))
+        await settle()
+        assert pos._must_queue("menu")
+        await held.__aexit__(None, None, None)
+        # The freed slot was handed to the queued order, so a new menu call still waits
+        assert pos.running["orders"] == 1
+        assert pos._must_queue("menu")
+        await asyncio.gather(order, call("menu"))
+        return admitted
+
+    assert asyncio.run(run()) == ["orders", "menu"]
+
+
+def test_cancel_while_queued_frees_the_queue_position():
+    async def run():
+        pos = make_scheduler()
+        admitted = []
+        release = asyncio.Event()
+
+        async def call(work_class, wait=False):
+            async with pos.slot(work_class):
+                admitted.append(work_class)
+                if wait:
+                    await release.wait()
+
+        holder = asyncio.create_task(call("orders", wait=True))
+        await settle()
+        cancelled = asyncio.create_task(call("orders"))
+        menu = asyncio.create_task(call("menu"))
+        await settle()
+        cancelled.cancel()
+        await settle()
+        release.set()
+        await asyncio.gather(holder, menu)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return admitted, pos
+
+    admitted, pos = asyncio.run(run())
+    assert admitted == ["orders", "menu"]
+    assert pos.total_running == 0
+    assert all(running == 0 for running in pos.running.values())
+
+
+def test_full_queue_is_shed_with_retry_after():
+    async def run():
+        pos = make_scheduler(max_concurrency=2, max_queue=1)
+        release = asyncio.Event()
+
+        async def call(wait=False):
+            async with pos.slot("menu"):
+                if wait:
+                    await release.wait()
+
+        holder = asyncio.create_task(call(wait=True))
+        await settle()
+        queued = asyncio.create_task(call())
+        await settle()
+        with pytest.raises(PosOverloaded) as shed:
+            async with pos.slot("menu"):
+                pass
+        # Other classes have their own queues and are unaffected
+        async with pos.slot("orders"):
+            pass
+        release.set()
+        await asyncio.gather(holder, queued)
+        return shed.value
+
+    shed = asyncio.run(run())
+    assert shed.status_code == 429
+    assert int(shed.headers["Retry-After"]) >= 1
+
+
+def test_retry_after_scales_with_backlog_and_service_time():
+    pos = make_scheduler(concurrency=2)
+    pos.service_time["menu"] = 3.0
+    pos.running["menu"] = 2
+    pos.queues["menu"].extend([object()] * 4)
+    assert pos.retry_after("menu") == 9
+
+
+def test_rate_limiter_allows_burst_then_rejects(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scheduler.time, "monotonic", lambda: now[0])
+    limiter = OrderRateLimiter(rate_per_minute=6, burst=2)
+
+    limiter.check("kiosk-a")
+    limiter.check("kiosk-a")
+    with pytest.raises(PosOverloaded) as limited:
+        limiter.check("kiosk-a")
+    assert limited.value.status_code == 429
+    assert limited.value.headers["Retry-After"] == "10"
+
+    # Buckets are per kiosk
+    limiter.check("kiosk-b")
+
+    now[0] += 10
+    limiter.check("kiosk-a")
+    with pytest.raises(PosOverloaded):
+        limiter.check("kiosk-a")
+
+
+def test_rate_limiter_disabled_at_zero():
+    limiter = OrderRateLimiter(rate_per_minute=0, burst=1)
+    for _ in range(100):
+        limiter.check("kiosk-a")
+    assert limiter.buckets == {}
@@ -0,0 +1,226 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import PyMongoError
+
+import shared_cache
+from bench.memory_db import MemoryDatabase
+from shared_cache import MongoSnapshotCache, acquire_lease, release_lease
+
+
+LEASE = timedelta(seconds=30)
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Switch which worker the lease calls act as"""
+    def switch(worker_id):
+        monkeypatch.setattr(shared_cache, "WORKER_ID", worker_id)
+    switch("worker-a")
+    return switch
+
+
+def make_cache(db, **kwargs):
+    kwargs.setdefault("l1_ttl_seconds", 0)
+    kwargs.setdefault("wait_seconds", 2)
+    return MongoSnapshotCache("menu", 300, lambda: db, **kwargs)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_lease_is_exclusive_renewable_and_released(worker):
+    async def run():
+        leases = MemoryDatabase().cache_leases
+        assert await acquire_lease(leases, "menu:pos", LEASE)
+        # The holder may extend its own lease
+        assert await acquire_lease(leases, "menu:pos", LEASE)
+        worker("worker-b")
+        assert not await acquire_lease(leases, "menu:pos", LEASE)
+        # Only the owner can release it
+        await release_lease(leases, "menu:pos")
+        assert not await acquire_lease(leases, "menu:pos", LEASE)
+        worker("worker-a")
+        await release_lease(leases, "menu:pos")
+        worker("worker-b")
+        assert await acquire_lease(leases, "menu:pos", LEASE)
+        return await leases.find_one({"_id": "menu:pos"})
+
+    assert asyncio.run(run())["owner"] == "worker-b"
+
+
+def test_expired_lease_is_taken_over(worker):
+    async def run():
+        leases = MemoryDatabase().cache_leases
+        assert await acquire_lease(leases, "menu:pos", LEASE)
+        await leases.update_one({"_id": "menu:pos"},
+                                {"$set": {"lease_until": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        worker("worker-b")
+        assert await acquire_lease(leases, "menu:pos", LEASE)
+        worker("worker-a")
+        assert not await acquire_lease(leases, "menu:pos", LEASE)
+        return await leases.find_one({"_id": "menu:pos"})
+
+    assert asyncio.run(run())["owner"] == "worker-b"
+
+
+def test_one_worker_loads_and_the_other_adopts_its_snapshot(worker):
+    async def run():
+        db = MemoryDatabase()
+        cache_a, cache_b = make_cache(db), make_cache(db)
+        calls = []
+        release = asyncio.Event()
+
+        async def load():
+            calls.append(shared_cache.WORKER_ID)
+            await release.wait()
+            return {"foods": [1, 2, 3]}
+
+        loading = asyncio.create_task(cache_a.get("pos", load))
+        await settle()
+        assert calls == ["worker-a"]
+
+        worker("worker-b")
+        waiting = asyncio.create_task(cache_b.get("pos", load))
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+        release.set()
+        return calls, await loading, await waiting
+
+    calls, entry_a, entry_b = asyncio.run(run())
+    assert calls == ["worker-a"]
+    assert entry_b.version == entry_a.version
+    assert entry_b.data == {"foods": [1, 2, 3]}
+
+
+def test_l1_revalidates_against_the_shared_version(worker):
+    async def run():
+        db = MemoryDatabase()
+        cache_a, cache_b = make_cache(db), make_cache(db)
+        calls = []
+
+        async def load():
+            calls.append(shared_cache.WORKER_ID)
+            return {"foods": len(calls)}
+
+        first = await cache_a.get("pos", load)
+        worker("worker-b")
+        adopted = await cache_b.get("pos", load)
+        adopted.derived["snapshot"] = "built"
+        # Same shared version: the L1 entry (and what was derived from it) is kept
+        same = await cache_b.get("pos", load)
+
+        worker("worker-a")
+        await asyncio.sleep(0.002)
+        refreshed = await cache_a.get("pos", load, force_refresh=True)
+        worker("worker-b")
+        updated = await cache_b.get("pos", load)
+        return calls, first, adopted, same, refreshed, updated
+
+    calls, first, adopted, same, refreshed, updated = asyncio.run(run())
+    assert calls == ["worker-a", "worker-a"]
+    assert adopted.version == first.version
+    assert same is adopted
+    assert same.derived == {"snapshot": "built"}
+    assert refreshed.version != first.version
+    assert updated.version == refreshed.version
+    assert updated.data == {"foods": 2}
+    assert updated.derived == {}
+
+
+def test_l1_is_served_without_a_shared_read_within_its_ttl(worker):
+    async def run():
+        db = MemoryDatabase()
+        cache = make_cache(db, l1_ttl_seconds=60)
+
+        async def load():
+            return {"foods": [1]}
+
+        entry = await cache.get("pos", load)
+        await db.cache_snapshots.delete_many({})
+        return entry, await cache.get("pos", load)
+
+    entry, again = asyncio.run(run())
+    assert again is entry
+
+
+def test_worker_without_a_snapshot_loads_itself_when_the_refresher_stalls(worker):
+    async def run():
+        db = MemoryDatabase()
+        # Another worker took the lease and never wrote a snapshot
+        worker("worker-stalled")
+        assert await acquire_lease(db.cache_leases, "menu:pos", LEASE)
+        worker("worker-b")
+        cache = make_cache(db, wait_seconds=0.3)
+        calls = []
+
+        async def load():
+            calls.append(shared_cache.WORKER_ID)
+            return {"foods": [1]}
+
+        return calls, await cache.get("pos", load)
+
+    calls, entry = asyncio.run(run())
+    assert calls == ["worker-b"]
+    assert entry.data == {"foods": [1]}
+
+
+def test_stale_snapshot_is_served_while_another_worker_refreshes(worker):
+    async def run():
+        db = MemoryDatabase()
+        cache = make_cache(db)
+        calls = []
+
+        async def load():
+            calls.append(shared_cache.WORKER_ID)
+            return {"foods": len(calls)}
+
+        stale = await cache.get("pos", load)
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        stale.expires = expired
+        await db.cache_snapshots.update_one({"_id": "menu:pos"}, {"$set": {"expires": expired}})
+        worker("worker-b")
+        assert await acquire_lease(db.cache_leases, "menu:pos", LEASE)
+        worker("worker-a")
+        return calls, stale, await cache.get("pos", load)
+
+    calls, stale, served = asyncio.run(run())
+    assert calls == ["worker-a"]
+    assert served is stale
+
+
+class UnavailableCollection:
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise PyMongoError("connection refused")
+        return fail
+
+
+class UnavailableDatabase:
+    def __getattr__(self, name):
+        return UnavailableCollection()
+
+
+def test_falls_back_to_local_caching_when_mongo_is_unavailable(worker):
+    async def run():
+        cache = MongoSnapshotCache("menu", 300, UnavailableDatabase, l1_ttl_seconds=0)
+        calls = []
+
+        async def load():
+            calls.append(1)
+            return {"foods": [1]}
+
+        first = await cache.get("pos", load)
+        # Still fresh locally: served without reloading
+        second = await cache.get("pos", load)
+        put = await cache.put("pos", {"foods": [2]})
+        return calls, first, second, put, cache.peek("pos")
+
+    calls, first, second, put, current = asyncio.run(run())
+    assert calls == [1]
+    assert second is first
+    assert current is put
+    assert put.data == {"foods": [2]}
@@ -0,0 +1,68 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_natural_sort_key_orders_numbers_numerically():
+    tables = ["T10", "t2", "T1", "Patio 3", "12", "2", "Patio 10"]
+    assert sorted(tables, key=server.natural_sort_key) == ["2", "12", "Patio 3", "Patio 10", "T1", "t2", "T10"]
+
+
+POS_TABLES = [
+    {"id": 1, "table_no": "T10", "title": "Garden", "status": 1, "rtype": "TB", "f_name": "Asha"},
+    {"id": 2, "table_no": "T2", "title": "", "status": 1, "rtype": "TB"},
+    {"id": 3, "table_no": "T1", "title": "Garden", "status": 0, "rtype": "TB"},
+    {"id": 4, "table_no": "R1", "title": "Rooms", "status": 1, "rtype": "RM"},
+    {"id": 5, "table_no": "T3", "title": "Bar", "status": 1, "rtype": "TB", "f_name": "Asha", "l_name": "K"},
+]
+
+
+def test_table_registry_filters_sorts_and_groups():
+    registry = server.TableRegistry(POS_TABLES)
+    assert [t["table_no"] for t in registry.tables] == ["T2", "T3", "T10"]
+    assert set(registry.by_id) == {"1", "2", "5"}
+    assert registry.by_table_no["T3"]["waiter"] == "Asha K"
+    assert [g["name"] for g in registry.groups["section"]] == ["Bar", "Garden", ""]
+    assert [g["name"] for g in registry.groups["waiter"]] == ["Asha", "Asha K", ""]
+
+
+def test_table_registry_version_ignores_pos_order():
+    assert server.TableRegistry(POS_TABLES).version == server.TableRegistry(POS_TABLES[::-1]).version
+
+
+ROOMS_ONLY = [{"id": 4, "table_no": "R1", "title": "Rooms", "status": 1, "rtype": "RM"}]
+TABLE_CONFIG = "/restaurant-settings/table-config"
+ORDER = {"table_number": "7", "table_id": "77", "total": 100.0,
+         "items": [{"item_id": "1", "name": "Tea", "price": 100.0, "quantity": 1}]}
+
+
+def test_tables_without_active_tables_is_an_empty_list(pos):
+    pos.responses[TABLE_CONFIG] = (200, {"data": {"tables": ROOMS_ONLY}})
+    response = TestClient(server.app).get("/api/tables", headers={"Authorization": "Bearer tables-token-a"})
+    assert response.status_code == 200
+    assert response.json() == {"tables": [], "source": "pos"}
+
+
+def test_tables_fetch_failure_is_503(pos):
+    pos.status = 500
+    response = TestClient(server.app).get("/api/tables", headers={"Authorization": "Bearer tables-token-b"})
+    assert response.status_code == 503
+
+
+def place_order(table_config):
+    asyncio.run(server.tables_cache.put(server.POS_CACHE_KEY, table_config))
+    return TestClient(server.app).post("/api/orders", json=ORDER, headers={"Authorization": "Bearer tables-token-c"})
+
+
+def test_order_for_unknown_table_is_rejected(pos):
+    response = place_order(POS_TABLES)
+    assert response.status_code == 400
+
+
+def test_order_is_not_validated_against_an_empty_registry(pos):
+    # No active tables cached: the order goes to the POS (which fails here) instead of a 400
+    pos.status = 500
+    response = place_order(ROOMS_ONLY)
+    assert response.status_code == 503